@@ -1,4 +1,5 @@
-from .models import User
+from .models import OutboxMessage, User
 from django.contrib import admin
 
-admin.site.register(User)
\ No newline at end of file
+admin.site.register(User)
+admin.site.register(OutboxMessage)
@@ -0,0 +1,103 @@
+import copy, threading, time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    A bounded, per-process LRU of User rows keyed by primary key. Entries
+    expire after AUTH_USER_CACHE_TTL seconds and are dropped as soon as the
+    user is saved or deleted in this process (see accounts.signals), so the
+    TTL only bounds how long another process can serve a stale user.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size if max_size is not None else settings.AUTH_USER_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else settings.AUTH_USER_CACHE_TTL
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        # each request gets its own instance, so changes made by a view never leak into the cache
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[user_id] = (copy.copy(user), time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from user_cache, so
+    authenticated requests skip the User lookup while the entry is fresh.
+
+    core.routers.read_from_replica and the profiling middleware authenticate
+    the request before DRF does, so the outcome is kept on the HttpRequest
+    and the token is only validated once per request.
+    """
+
+    def authenticate(self, request):
+        http_request = getattr(request, '_request', request)
+        outcome = getattr(http_request, '_jwt_authentication', None)
+        if outcome is None:
+            try:
+                outcome = (super().authenticate(request), None)
+            except APIException as e:
+                outcome = (None, e)
+            http_request._jwt_authentication = outcome
+
+        authenticated, error = outcome
+        if error is not None:
+            raise error
+        return authenticated
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+            return user
+
+        # the same checks JWTAuthentication makes on a freshly loaded user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
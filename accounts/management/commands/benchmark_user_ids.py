@@ -0,0 +1,69 @@
+import datetime, time, uuid
+from accounts.ids import generate_user_id
+from accounts.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from events_app.benchmark import benchmark_database
+
+
+def legacy_user_id():
+    return str(uuid.uuid4())[:8]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares user insert throughput on a large user table with the legacy random 8-character IDs '
+        'and with the time-ordered IDs from accounts.ids'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--existing', type=int, default=200000, help='Users already in the table')
+        parser.add_argument('--inserts', type=int, default=50000, help='Users inserted and timed')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users inserted per transaction')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['inserts']} inserts on top of {options['existing']} users, "
+            f"{options['batch_size']} per transaction"
+        )
+        for label, generator in (('random (uuid4[:8])', legacy_user_id), ('time-ordered', generate_user_id)):
+            with benchmark_database():
+                self.insert(generator, options['existing'], options['batch_size'], 0)
+                elapsed, collisions = self.insert(generator, options['inserts'], options['batch_size'], options['existing'])
+                vendor = connection.vendor
+
+            self.stdout.write(
+                f'{label:<20} {options["inserts"] / elapsed:10.1f} inserts/s   '
+                f'collisions {collisions}   ({vendor})'
+            )
+
+    def insert(self, generator, count, batch_size, offset):
+        """Inserts count users in batches and returns the elapsed time and the number of ID collisions."""
+        collisions = 0
+        began = time.perf_counter()
+        for start in range(offset, offset + count, batch_size):
+            numbers = range(start, min(start + batch_size, offset + count))
+            ids = [generator() for _ in numbers]
+            # a colliding ID would fail the whole batch, so count it and draw again
+            taken = set(User.objects.filter(id__in=ids).values_list('id', flat=True))
+            for index, user_id in enumerate(ids):
+                while user_id in taken:
+                    collisions += 1
+                    user_id = generator()
+                taken.add(user_id)
+                ids[index] = user_id
+
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(
+                        id=user_id,
+                        email=f'bench{number}@example.com',
+                        username=f'bench{number}',
+                        first_name='Bench',
+                        last_name='User',
+                        date_of_birth=datetime.date(1990, 1, 1),
+                        phone_number=f'{number:010d}',
+                        password='!',
+                    ) for number, user_id in zip(numbers, ids)
+                ])
+        return time.perf_counter() - began, collisions
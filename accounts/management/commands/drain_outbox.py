@@ -0,0 +1,23 @@
+import time
+from accounts.outbox import drain_outbox
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Delivers pending outbox emails, retrying failures with backoff and dead-lettering the ones that keep failing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages claimed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new messages instead of exiting once drained')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls when idle')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, dead = drain_outbox(options['batch_size'])
+            if sent or retried or dead:
+                self.stdout.write(f'Sent {sent}, retrying {retried}, dead-lettered {dead}')
+
+            if sent + retried + dead < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
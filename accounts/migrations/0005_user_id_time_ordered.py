@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+import accounts.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.CharField(default=accounts.ids.generate_user_id, editable=False, max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
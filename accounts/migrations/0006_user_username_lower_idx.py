@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:34
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_id_time_ordered'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='accounts_user_uname_lwr_idx'),
+        ),
+    ]
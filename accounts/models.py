@@ -1,6 +1,8 @@
-import uuid
+from .ids import generate_user_id
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class MyUserManager(BaseUserManager):
@@ -26,8 +28,12 @@ class MyUserManager(BaseUserManager):
         return self.create_user(email,password,**extra_fields)
 
 
+# inserts tried before a colliding user ID is given up on, see accounts.ids
+USER_ID_ATTEMPTS = 3
+
+
 class User(AbstractUser):
-    id = models.CharField(primary_key=True, unique=True, max_length=8)
+    id = models.CharField(primary_key=True, unique=True, max_length=12, default=generate_user_id, editable=False)
     first_name = models.CharField(max_length=50)
     middle_name = models.CharField(max_length=50, blank=True)
     last_name = models.CharField(max_length=50)
@@ -43,11 +49,66 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username', 'date_of_birth']
 
-    def save(self, *args, **kwargs):
-        if not self.id:
-            self.id = str(uuid.uuid4())[:8]
-        super().save(*args, **kwargs)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # only an ID that came from generate_user_id may be replaced on a collision
+        self._generated_id = self.pk if not args and 'id' not in kwargs and 'pk' not in kwargs else None
 
     def __str__(self):
         return self.username
-    
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.pk != self._generated_id:
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(User, instance=self)
+        for attempt in range(USER_ID_ATTEMPTS):
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # another process that drew the same node generated this ID in the same millisecond
+                if attempt == USER_ID_ATTEMPTS - 1 or not User.objects.using(using).filter(pk=self.pk).exists():
+                    raise
+                self.pk = self._generated_id = generate_user_id()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # serves case-insensitive organizer filters on events
+            models.Index(Lower('username'), name='accounts_user_uname_lwr_idx'),
+        ]
+
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be handed to the email provider. Rows are written in
+    the same transaction as the change that triggers them and delivered by
+    the drain_outbox worker, see accounts.outbox.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead'),
+    ]
+
+    recipient = models.EmailField()
+    template = models.CharField(max_length=64)
+    data = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.template} to {self.recipient} ({self.status})'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='accounts_outbox_due_idx'),
+        ]
+
@@ -0,0 +1,100 @@
+import json, os
+from .models import OutboxMessage
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class CourierTransport:
+    def __init__(self):
+        from trycourier import Courier
+        self.client = Courier(auth_token=os.getenv('AUTH_TOKEN'))
+
+    def send(self, message):
+        self.client.send_message(
+            message={
+                "to": {
+                "email": message.recipient,
+                },
+                "template": message.template,
+                "data": message.data,
+            }
+        )
+
+
+class FileTransport:
+    """Appends each message as a JSON line to EMAIL_OUTBOX_FILE_PATH, for local development."""
+
+    def send(self, message):
+        with open(settings.EMAIL_OUTBOX_FILE_PATH, 'a') as outbox_file:
+            outbox_file.write(json.dumps({'to':message.recipient, 'template':message.template, 'data':message.data}) + '\n')
+
+
+class MemoryTransport:
+    """Keeps sent messages in MemoryTransport.sent, for tests."""
+    sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+def get_transport():
+    return import_string(settings.EMAIL_OUTBOX_TRANSPORT)()
+
+
+def enqueue_email(recipient, template, data):
+    return OutboxMessage.objects.create(recipient=recipient, template=template, data=data)
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    """
+    Leases up to batch_size due messages to this worker by pushing their
+    next attempt past the lease, so a crashed worker's messages are retried
+    once the lease runs out. Where the database supports it, rows locked by
+    another worker are skipped instead of waited on.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+            status=OutboxMessage.PENDING, next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'id')
+        messages = list(due[:batch_size])
+
+        OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+def drain_outbox(batch_size, transport=None):
+    transport = transport or get_transport()
+    sent = retried = dead = 0
+
+    for message in claim_batch(batch_size):
+        try:
+            transport.send(message)
+        except Exception as e:
+            message.last_error = str(e)
+            if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                message.status = OutboxMessage.DEAD
+                dead += 1
+            else:
+                message.next_attempt_at = timezone.now() + get_retry_delay(message.attempts)
+                retried += 1
+            message.save(update_fields=['status', 'next_attempt_at', 'last_error'])
+        else:
+            message.status = OutboxMessage.SENT
+            message.sent_at = timezone.now()
+            message.save(update_fields=['status', 'sent_at'])
+            sent += 1
+
+    return sent, retried, dead
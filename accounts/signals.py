@@ -0,0 +1,13 @@
+from .authentication import user_cache
+from .models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    user_cache.invalidate(instance.pk)
+    # a request may cache the old row again before the change commits
+    transaction.on_commit(lambda: user_cache.invalidate(instance.pk), using=using)
@@ -1,3 +1,106 @@
-from django.test import TestCase
+from .models import OutboxMessage, User
+from .outbox import MemoryTransport, drain_outbox
+from .utils import VERIFICATION_TEMPLATE
+from datetime import timedelta
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
 
-# Create your tests here.
+
+REGISTRATION = {
+    'username':'newuser',
+    'email':'newuser@example.com',
+    'password':'a-long-password',
+    'first_name':'New',
+    'middle_name':'',
+    'last_name':'User',
+    'phone_number':'0200000000',
+    'date_of_birth':'1990-01-01',
+}
+
+
+class FailingTransport:
+    def send(self, message):
+        raise ConnectionError('Email provider unavailable')
+
+
+class RegisterOutboxTests(TestCase):
+    def test_registration_enqueues_verification_email(self):
+        response = self.client.post(reverse('register_user'), REGISTRATION, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipient, REGISTRATION['email'])
+        self.assertEqual(message.template, VERIFICATION_TEMPLATE)
+        self.assertEqual(message.status, OutboxMessage.PENDING)
+        self.assertEqual(message.data['username'], REGISTRATION['username'])
+        self.assertIn(reverse('verify_user') + '?token=', message.data['link'])
+
+    def test_registration_rolls_back_when_email_cannot_be_enqueued(self):
+        with mock.patch('accounts.utils.enqueue_email', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('register_user'), REGISTRATION, content_type='application/json')
+
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_DELAY=30)
+class DrainOutboxTests(TestCase):
+    def setUp(self):
+        MemoryTransport.sent.clear()
+        self.message = OutboxMessage.objects.create(
+            recipient='user@example.com', template=VERIFICATION_TEMPLATE, data={'username':'user'}
+        )
+
+    def make_due(self):
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+
+    def test_delivered_message_is_marked_sent(self):
+        self.assertEqual(drain_outbox(10, transport=MemoryTransport()), (1, 0, 0))
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboxMessage.SENT)
+        self.assertIsNotNone(self.message.sent_at)
+        self.assertEqual(self.message.attempts, 1)
+        self.assertEqual([message.id for message in MemoryTransport.sent], [self.message.id])
+
+        self.make_due()
+        self.assertEqual(drain_outbox(10, transport=MemoryTransport()), (0, 0, 0))
+
+    def test_failed_message_is_retried_with_backoff(self):
+        began = timezone.now()
+        self.assertEqual(drain_outbox(10, transport=FailingTransport()), (0, 1, 0))
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboxMessage.PENDING)
+        self.assertEqual(self.message.attempts, 1)
+        self.assertEqual(self.message.last_error, 'Email provider unavailable')
+        self.assertGreaterEqual(self.message.next_attempt_at, began + timedelta(seconds=30))
+
+        # not due again until the delay has passed
+        self.assertEqual(drain_outbox(10, transport=FailingTransport()), (0, 0, 0))
+
+        self.make_due()
+        began = timezone.now()
+        self.assertEqual(drain_outbox(10, transport=FailingTransport()), (0, 1, 0))
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.attempts, 2)
+        self.assertGreaterEqual(self.message.next_attempt_at, began + timedelta(seconds=60))
+
+    def test_message_is_dead_lettered_after_max_attempts(self):
+        for attempt in range(2):
+            self.assertEqual(drain_outbox(10, transport=FailingTransport()), (0, 1, 0))
+            self.make_due()
+        self.assertEqual(drain_outbox(10, transport=FailingTransport()), (0, 0, 1))
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboxMessage.DEAD)
+        self.assertEqual(self.message.attempts, 3)
+
+        self.make_due()
+        self.assertEqual(drain_outbox(10, transport=MemoryTransport()), (0, 0, 0))
+        self.assertEqual(MemoryTransport.sent, [])
@@ -1,36 +1,30 @@
-import os
-from dotenv import load_dotenv
-from trycourier import Courier
+from .outbox import enqueue_email
 
-load_dotenv()
 
-client = Courier(auth_token=os.getenv('AUTH_TOKEN'))
+VERIFICATION_TEMPLATE = "HQRFKDHDK84B16GJAQ7PWPFATXS8"
+PASSWORD_RESET_TEMPLATE = "WF7909Y7ZWMNWNNTNNQRHDTBKDF4"
+
+
+# Emails are queued in the outbox and delivered by `manage.py drain_outbox`, so call
+# these inside the transaction that makes the change the email is about.
 
 def send_verification_email(email, link, username):
-    client.send_message(
-        message={
-            "to": {
-            "email": email,
-            },
-            "template": "HQRFKDHDK84B16GJAQ7PWPFATXS8",
-            "data": {
+    enqueue_email(
+        recipient=email,
+        template=VERIFICATION_TEMPLATE,
+        data={
             "username": username,
             "link": link,
-            },
-        }
+        },
     )
 
 
 def send_password_reset_email(email, username, link):
-    client.send_message(
-        message={
-            "to": {
-            "email": email,
-            },
-            "template": "WF7909Y7ZWMNWNNTNNQRHDTBKDF4",
-            "data": {
+    enqueue_email(
+        recipient=email,
+        template=PASSWORD_RESET_TEMPLATE,
+        data={
             "username": username,
             "link": link,
-            },
-        }
+        },
     )
@@ -2,10 +2,12 @@ import jwt, os
 from .models import User
 from .serializers import RegisterUserSerializer, LoginUserSerializer
 from .utils import send_verification_email, send_password_reset_email
+from core.routers import read_from_replica
 from dotenv import load_dotenv
 from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils.encoding import force_bytes
@@ -26,15 +28,15 @@ def register_user_view(request):
         serializer = RegisterUserSerializer(data=request.data)
 
         if serializer.is_valid(raise_exception=True):
-            serializer.save()
+            with transaction.atomic():
+                user = serializer.save()
 
-            user = User.objects.get(email=serializer.validated_data['email'])
-            token = RefreshToken.for_user(user)
-            current_site = get_current_site(request).domain
-            relative_link = reverse('verify_user')
-            absolute_url = f'http://{current_site}{relative_link}?token={token}'
-            link = str(absolute_url)
-            send_verification_email(email=user.email, username=user.username, link=link)
+                token = RefreshToken.for_user(user)
+                current_site = get_current_site(request).domain
+                relative_link = reverse('verify_user')
+                absolute_url = f'http://{current_site}{relative_link}?token={token}'
+                link = str(absolute_url)
+                send_verification_email(email=user.email, username=user.username, link=link)
 
             return Response(
                 {
@@ -121,6 +123,7 @@ def login_user_view(request):
             )
 
 
+@read_from_replica
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_users_view(request):
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('EVENT_ASYNC_READ_VIEWS', 'true')
+# async views run their queries in a fresh thread per request, so persistent connections would pile up and never be reused
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
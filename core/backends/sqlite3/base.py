@@ -0,0 +1,25 @@
+"""
+Django's SQLite backend, plus PRAGMAs applied to every new connection.
+
+The PRAGMAs come from OPTIONS['pragmas'], a mapping of PRAGMA name to value:
+
+    'OPTIONS': {'pragmas': {'journal_mode': 'wal', 'synchronous': 'normal'}}
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', {})
+        for name, value in self.pragmas.items():
+            if not name.replace('_', '').isalnum() or not str(value).replace('-', '').isalnum():
+                raise ImproperlyConfigured(f'Invalid SQLite PRAGMA {name!r} = {value!r}')
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
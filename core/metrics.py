@@ -0,0 +1,233 @@
+"""
+In-process request metrics, shared between worker processes through files.
+
+Each process counts into its own Registry and writes a snapshot of it to
+METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds. The /metrics view
+adds up the snapshots of every process and renders them in the Prometheus
+text format. Each process only ever writes its own file. The files of
+processes that have exited are deleted on the next scrape, which Prometheus
+sees as a counter reset. Processes are looked up by the pid in the file name, so METRICS_DIR
+must be local to the host.
+"""
+import json, os, secrets, threading, time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from pathlib import Path
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+HELP = {
+    'http_requests_total':('counter', 'Requests handled, by route, method and status'),
+    'http_request_duration_seconds':('histogram', 'Time spent handling requests'),
+    'http_response_size_bytes':('histogram', 'Size of non-streaming response bodies'),
+    'http_db_queries_total':('counter', 'Database queries run while handling requests'),
+    'http_db_query_duration_seconds_total':('counter', 'Time spent in database queries while handling requests'),
+}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+        self.path = Path(settings.METRICS_DIR) / f'metrics-{os.getpid()}-{secrets.token_hex(4)}.json'
+        self.flushed_at = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            # one count per bucket, then the sum and the total count
+            histogram = self.histograms[key] = [0] * len(buckets) + [0, 0]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                histogram[index] += 1
+                break
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def record(self, route, method, status_code, duration, size, queries, query_time):
+        labels = (('method', method), ('route', route))
+        with self.lock:
+            self.inc('http_requests_total', labels + (('status', str(status_code)),))
+            self.observe('http_request_duration_seconds', labels, duration, DURATION_BUCKETS)
+            if size is not None:
+                self.observe('http_response_size_bytes', labels, size, SIZE_BUCKETS)
+            if queries:
+                self.inc('http_db_queries_total', labels, queries)
+                self.inc('http_db_query_duration_seconds_total', labels, query_time)
+
+            if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+                self.flush()
+
+    def snapshot(self):
+        return {
+            'counters':[[name, labels, value] for (name, labels), value in self.counters.items()],
+            'histograms':[[name, labels, values] for (name, labels), values in self.histograms.items()],
+        }
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, self.path)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = Registry()
+    return _registry
+
+
+def _reset_after_fork():
+    # the parent's counts are the parent's to report
+    if _registry is not None:
+        _registry.lock = threading.Lock()
+        _registry.reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Database time is collected by an execute wrapper installed on every
+# connection, so queries run in sync_to_async threads are counted too
+
+query_stats = ContextVar('query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    began = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - began
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def enable_query_metrics():
+    connection_created.connect(install_query_wrapper, dispatch_uid='core.metrics.install_query_wrapper')
+    for connection in connections.all(initialized_only=True):
+        install_query_wrapper(sender=None, connection=connection)
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # running as another user
+        return True
+    return True
+
+
+def is_stale(path):
+    """Whether the snapshot was written by a process that has since exited: a test run, a benchmark or a replaced worker."""
+    try:
+        pid = int(path.name.split('-')[1])
+    except (IndexError, ValueError):
+        return False
+    return not is_running(pid)
+
+
+def collect():
+    """Adds up the snapshots of every process, using this process's live counts."""
+    registry = get_registry()
+    with registry.lock:
+        snapshots = [registry.snapshot()]
+
+    for path in Path(settings.METRICS_DIR).glob('metrics-*.json'):
+        if path == registry.path:
+            continue
+        if is_stale(path):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # the file vanished or is being replaced, its process reports again on the next scrape
+            continue
+
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+    return counters, histograms
+
+
+def format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render_metrics():
+    counters, histograms = collect()
+    lines = []
+    for metric, (kind, description) in HELP.items():
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} {kind}')
+
+        if kind == 'counter':
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f'{metric}{format_labels(labels)} {value}')
+            continue
+
+        buckets = DURATION_BUCKETS if metric == 'http_request_duration_seconds' else SIZE_BUCKETS
+        for (name, labels), values in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f'{metric}_bucket{format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{metric}_bucket{format_labels(labels + (("le", "+Inf"),))} {values[-1]}')
+            lines.append(f'{metric}_sum{format_labels(labels)} {values[-2]}')
+            lines.append(f'{metric}_count{format_labels(labels)} {values[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,138 @@
+import cProfile, json, random, re, time, uuid
+from .metrics import enable_query_metrics, get_registry, query_stats
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from pathlib import Path
+from rest_framework.exceptions import APIException
+
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and writes the profile and the SQL
+    queries they ran to PROFILING_DIR. A request is profiled when a staff
+    user sends the PROFILING_HEADER header, or when it falls in the
+    PROFILING_SAMPLE_RATE fraction of traffic. The file name is returned in
+    the X-Profile-Id response header.
+
+    With PROFILING_ENABLED off the middleware removes itself from the chain
+    at startup, so it costs nothing. Streaming bodies are produced after the
+    view returns, so they are not covered by the profile.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace('-', '_')
+        self.directory = Path(settings.PROFILING_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+            began = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - began
+
+        profile_id = self.get_profile_id(request)
+        profiler.dump_stats(self.directory / f'{profile_id}.prof')
+        with open(self.directory / f'{profile_id}.sql.json', 'w') as log_file:
+            json.dump({
+                'method':request.method,
+                'path':request.get_full_path(),
+                'status':response.status_code,
+                'duration':duration,
+                'queries':[
+                    {'alias':context.connection.alias, **query}
+                    for context in captured for query in context.captured_queries
+                ],
+            }, log_file, indent=2)
+
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def should_profile(self, request):
+        if self.header in request.META:
+            return self.is_staff(request)
+        return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def is_staff(self, request):
+        if getattr(request, 'user', None) is not None and request.user.is_staff:
+            return True
+
+        # API clients authenticate inside the view, so check their token here
+        from accounts.authentication import CachedJWTAuthentication
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
+
+    def get_profile_id(self, request):
+        slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-') or 'root'
+        return f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method.lower()}-{slug[:80]}-{uuid.uuid4().hex[:8]}'
+
+
+class MetricsMiddleware:
+    """
+    Records each request's route, status, latency, response size and
+    database queries in core.metrics. Routes are URL patterns rather than
+    paths, so event ids never become labels. It runs in whichever mode the
+    rest of the chain does, so async views are not moved to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        enable_query_metrics()
+        self.get_response = get_response
+        self.registry = get_registry()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats = [0, 0.0]
+        token = query_stats.set(stats)
+        began = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - began
+            query_stats.reset(token)
+        return self.record(request, response, duration, stats)
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = query_stats.set(stats)
+        began = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - began
+            query_stats.reset(token)
+        return self.record(request, response, duration, stats)
+
+    def record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        self.registry.record(route, request.method, response.status_code, duration, size, stats[0], stats[1])
+        return response
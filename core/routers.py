@@ -0,0 +1,99 @@
+"""
+Routes the reads of read-only views to a replica database.
+
+Views decorated with @read_from_replica run with one replica, picked at
+random from the replica_* aliases (see DB_REPLICAS in settings). Every other
+read and all writes go to the primary. A user who has just written through
+a view that calls pin_to_primary() keeps reading from the primary for
+DB_REPLICA_PIN_SECONDS, so they always see their own changes.
+"""
+import asyncio, random
+from asgiref.sync import sync_to_async
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from functools import wraps
+from rest_framework.exceptions import APIException
+
+
+replica_alias = ContextVar('replica_alias', default=None)
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def get_pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin_to_primary(user):
+    if get_replicas() and settings.DB_REPLICA_PIN_SECONDS > 0:
+        cache.set(get_pin_key(user.pk), True, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def get_user_id(request):
+    """
+    The id of the user a bearer token belongs to, or None. The outcome is kept
+    on the request, so the view's own authentication does not check the token again.
+    """
+    from accounts.authentication import CachedJWTAuthentication
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return authenticated[0].pk if authenticated is not None else None
+
+
+def read_from_replica(view):
+    """Sends the view's reads to a replica, unless the requesting user is pinned to the primary."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapped(request, *args, **kwargs):
+            replicas = get_replicas()
+            if not replicas or request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+
+            user_id = await sync_to_async(get_user_id)(request)
+            if user_id is not None and await cache.aget(get_pin_key(user_id)):
+                return await view(request, *args, **kwargs)
+
+            token = replica_alias.set(random.choice(replicas))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                replica_alias.reset(token)
+        return async_wrapped
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        replicas = get_replicas()
+        if not replicas or request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+
+        user_id = get_user_id(request)
+        if user_id is not None and cache.get(get_pin_key(user_id)):
+            return view(request, *args, **kwargs)
+
+        token = replica_alias.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            replica_alias.reset(token)
+    return wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return replica_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -10,7 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
-import os
+import os, sys, tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 from pathlib import Path
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -82,13 +84,74 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before reuse. core.asgi defaults it to 0,
+# use a pooler such as PgBouncer there instead
+# core.backends.sqlite3 is Django's SQLite backend plus the PRAGMAs set below
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'core.backends.sqlite3')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': DB_ENGINE,
+        'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() in ('1', 'true', 'yes'),
     }
 }
 
+if DB_ENGINE == 'core.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {
+        # seconds a connection waits on a locked database before raising "database is locked"
+        'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+        # take the write lock when a transaction starts, so waiting writers honour the timeout
+        'transaction_mode': 'IMMEDIATE',
+        'pragmas': {
+            # readers no longer block on a writer, or the writer on them
+            'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+            'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+            'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -20000)),
+            'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 134217728)),
+            'temp_store': 'memory',
+        },
+    }
+
+# Read replicas for the read-only endpoints, see core.routers. DB_REPLICAS is a comma-separated
+# list of database files for SQLite and of hosts otherwise
+
+DB_REPLICAS = [replica for replica in os.getenv('DB_REPLICAS', '').split(',') if replica]
+
+for index, replica in enumerate(DB_REPLICAS):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        ('NAME' if DB_ENGINE.endswith('sqlite3') else 'HOST'): replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they create, update or register for an event
+
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Use a shared backend (e.g. django.core.cache.backends.redis.RedisCache) when running
+# several worker processes so cache invalidation reaches all of them
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+EVENT_CACHE_TIMEOUT = int(os.getenv('EVENT_CACHE_TIMEOUT', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -135,11 +198,79 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'accounts.authentication.CachedJWTAuthentication'
     ]
 }
 
+# Node for time-ordered user IDs, see accounts.ids; give each process that creates users its own value (0-255)
+
+USER_ID_NODE = int(os.environ['USER_ID_NODE']) if os.getenv('USER_ID_NODE') else None
+
+# Per-process cache of authenticated users, see accounts.authentication
+
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 10000))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=3),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
+
+# Pagination for the event list endpoints
+
+EVENT_PAGE_SIZE = int(os.getenv('EVENT_PAGE_SIZE', 50))
+EVENT_MAX_PAGE_SIZE = int(os.getenv('EVENT_MAX_PAGE_SIZE', 200))
+
+# Full-text search backend for /event/search, picked from the database vendor when unset
+
+EVENT_SEARCH_BACKEND = os.getenv('EVENT_SEARCH_BACKEND', '')
+
+# Values returned per facet by /event/facets, most common first
+
+EVENT_FACET_LIMIT = int(os.getenv('EVENT_FACET_LIMIT', 20))
+
+# iCalendar feeds: how long rendered feeds stay cached, and how long clients may reuse them
+
+EVENT_CALENDAR_CACHE_TIMEOUT = int(os.getenv('EVENT_CALENDAR_CACHE_TIMEOUT', 86400))
+EVENT_CALENDAR_MAX_AGE = int(os.getenv('EVENT_CALENDAR_MAX_AGE', 300))
+
+# Default and largest radius, in km, accepted by /event/near
+
+EVENT_NEAR_DEFAULT_RADIUS_KM = float(os.getenv('EVENT_NEAR_DEFAULT_RADIUS_KM', 10))
+EVENT_NEAR_MAX_RADIUS_KM = float(os.getenv('EVENT_NEAR_MAX_RADIUS_KM', 200))
+
+# Largest batch accepted by the bulk event and registration endpoints
+
+EVENT_BULK_MAX_ITEMS = int(os.getenv('EVENT_BULK_MAX_ITEMS', 5000))
+
+# Email outbox, delivered by `manage.py drain_outbox`
+# Transports: accounts.outbox.CourierTransport, accounts.outbox.FileTransport, accounts.outbox.MemoryTransport
+
+EMAIL_OUTBOX_TRANSPORT = os.getenv('EMAIL_OUTBOX_TRANSPORT', 'accounts.outbox.CourierTransport')
+EMAIL_OUTBOX_FILE_PATH = os.getenv('EMAIL_OUTBOX_FILE_PATH', BASE_DIR / 'outbox.jsonl')
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 30))
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', 300))
+
+# Rows fetched and rendered per chunk when streaming event lists with ?stream=1
+
+EVENT_STREAM_CHUNK_SIZE = int(os.getenv('EVENT_STREAM_CHUNK_SIZE', 2000))
+
+# Serve the read-only event endpoints with native async views, enabled by core/asgi.py
+
+EVENT_ASYNC_READ_VIEWS = os.getenv('EVENT_ASYNC_READ_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Per-request profiling, see core.middleware.ProfilingMiddleware
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+PROFILING_HEADER = os.getenv('PROFILING_HEADER', 'X-Profile')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+
+# Request metrics served at /metrics, see core.metrics. Every worker process writes its counts to METRICS_DIR,
+# which defaults to a directory under the system temp dir, point it at a runtime dir such as /run/<service> in
+# production. Snapshots of exited processes are pruned. Off by default under manage.py test
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false' if sys.argv[1:2] == ['test'] else 'true').lower() in ('1', 'true', 'yes')
+METRICS_DIR = os.getenv('METRICS_DIR', Path(tempfile.gettempdir()) / 'event-management-api-metrics')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
@@ -13,6 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from .metrics import metrics_view
 from django.contrib import admin
 from django.urls import path, include
 
@@ -20,4 +21,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('accounts.urls')),
     path('event/', include('events_app.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
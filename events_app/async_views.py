@@ -0,0 +1,270 @@
+"""
+Native async versions of the read-only event endpoints, served in place of
+the sync views when EVENT_ASYNC_READ_VIEWS is on (core/asgi.py turns it on).
+They return the same JSON bodies as their DRF counterparts but await the
+database through Django's async ORM instead of pinning a worker thread.
+"""
+from . import facets, views
+from .cache import aget_event_metadata, cache_response, event_etag, event_last_modified, get_facet_window_start, get_today, get_window_start, list_etag, list_last_modified
+from .models import Event
+from .pagination import DistancePagination, KeysetPagination, SearchPagination
+from .search import get_search_backend
+from .serializers import EventDistanceSerializer, EventProjectionSerializer
+from .streaming import is_stream_requested
+from asgiref.sync import sync_to_async
+from core.routers import read_from_replica
+from django.conf import settings
+from django.db import router
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+from functools import wraps
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from zoneinfo import ZoneInfo
+
+
+def render(data, status=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def read_only_view(view):
+    """The parts of @api_view(['GET']) these views need: method checks and DRF-style errors."""
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return render(
+                {'detail':f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        try:
+            return await view(request, *args, **kwargs)
+        except NotFound as e:
+            return render({'detail':str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+    return wrapped
+
+
+def with_event_metadata(view):
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        await aget_event_metadata(request, kwargs['event_id'])
+        return await view(request, *args, **kwargs)
+    return wrapped
+
+
+async def paginated_events(request, queryset, key, message=None, ordering=None):
+    paginator = KeysetPagination(ordering=ordering)
+    events = await paginator.apaginate_queryset(EventProjectionSerializer.project(queryset), request)
+
+    data = {'success':True}
+    if message is not None:
+        data['message'] = message
+    data[key] = EventProjectionSerializer(events, many=True).data
+    data.update(paginator.get_paginated_meta())
+    return render(data)
+
+
+@read_from_replica
+@read_only_view
+@with_event_metadata
+@condition(etag_func=event_etag, last_modified_func=event_last_modified)
+@cache_response()
+async def get_event_details_view(request, event_id):
+    event = await EventProjectionSerializer.project(Event.objects.filter(id=event_id)).afirst()
+
+    if event is None:
+        return render(
+            {
+                'success':False,
+                'message':'Event does not exist'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return render(
+        {
+            'success':True,
+            'event':EventProjectionSerializer(event).data
+        }
+    )
+
+
+@read_from_replica
+@read_only_view
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+@cache_response()
+async def get_all_events_view(request):
+    if is_stream_requested(request):
+        return await sync_to_async(views.get_all_events_view)(request)
+
+    return await paginated_events(request, Event.objects.all(), 'event')
+
+
+@read_from_replica
+@read_only_view
+async def search_events_view(request):
+    query = request.GET.get('query')
+
+    if not query:
+        return render(
+            {
+                'success':False,
+                'message':'Please provide a search query'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # the search backends talk to the database through raw cursors, which have no async API
+    paginator = SearchPagination()
+    queryset = EventProjectionSerializer.project(Event.objects.all())
+    events = await sync_to_async(paginator.paginate_search)(get_search_backend(router.db_for_read(Event)), query, queryset, request)
+
+    return render(
+        {
+            'success':True,
+            'message':'Here are your search results',
+            'events':EventProjectionSerializer(events, many=True).data,
+            **paginator.get_paginated_meta()
+        }
+    )
+
+
+@read_from_replica
+@read_only_view
+@cache_response()
+async def events_near_view(request):
+    try:
+        latitude, longitude, radius = views.parse_near_query(request.GET)
+    except (KeyError, ValueError):
+        return render(
+            {
+                'success':False,
+                'message':f'Please provide lat and lng in degrees and a radius of up to {settings.EVENT_NEAR_MAX_RADIUS_KM} km'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # candidates are ranked in Python between the queries, so the whole page is fetched in one sync call
+    paginator = DistancePagination()
+    queryset = EventProjectionSerializer.project(Event.objects.all())
+    events = await sync_to_async(paginator.paginate_near)(latitude, longitude, radius, queryset, request)
+
+    return render(
+        {
+            'success':True,
+            'message':'Here are the events near you',
+            'events':EventDistanceSerializer(events, many=True).data,
+            **paginator.get_paginated_meta()
+        }
+    )
+
+
+@read_from_replica
+@read_only_view
+@cache_response(vary=get_facet_window_start)
+async def event_facets_view(request):
+    names = views.parse_facet_names(request.GET.get('facets'))
+
+    if names is None:
+        return render(
+            {
+                'success':False,
+                'message':f"Please choose facets from {', '.join(facets.FACETS)}"
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # a search scope goes through the backend's raw SQL, which has no async API
+    try:
+        total, counts = await sync_to_async(views.get_event_facets)(names, request.GET)
+    except (KeyError, ValueError):
+        return render(
+            {
+                'success':False,
+                'message':'Please provide ISO 8601 dates or datetimes and a valid time zone'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return render(
+        {
+            'success':True,
+            'message':'Here are the event counts',
+            'count':total,
+            'facets':counts
+        }
+    )
+
+
+@read_from_replica
+@read_only_view
+async def filter_events_view(request):
+    if is_stream_requested(request):
+        return await sync_to_async(views.filter_events_view)(request)
+
+    name = request.GET.get('name')
+    location = request.GET.get('location')
+    organizer = request.GET.get('organizer')
+
+    if not name and not location and not organizer:
+        return render(
+            {
+                'success':False,
+                'message':'Please provide a filter query'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    events = views.get_filtered_events(name, location, organizer)
+    return await paginated_events(request, events, 'events', message='Here are the events after filtering')
+
+
+@read_from_replica
+@read_only_view
+@cache_response(vary=get_today)
+async def events_within_next_7_days_view(request):
+    if is_stream_requested(request):
+        return await sync_to_async(views.events_within_next_7_days_view)(request)
+
+    message = 'Results for events within the next week'
+    return await paginated_events(request, views.get_timeframe(days=7), 'events', message, ('starts_at', 'id'))
+
+
+@read_from_replica
+@read_only_view
+@cache_response(vary=get_today)
+async def events_within_next_month_view(request):
+    if is_stream_requested(request):
+        return await sync_to_async(views.events_within_next_month_view)(request)
+
+    message = 'Results for events within the next week'
+    return await paginated_events(request, views.get_timeframe(days=30), 'events', message, ('starts_at', 'id'))
+
+
+@read_from_replica
+@read_only_view
+@cache_response(vary=get_window_start)
+async def events_within_window_view(request):
+    if is_stream_requested(request):
+        return await sync_to_async(views.events_within_window_view)(request)
+
+    start = request.GET.get('from')
+    end = request.GET.get('to')
+    tz = request.GET.get('tz')
+
+    try:
+        tz = ZoneInfo(tz) if tz else timezone.get_default_timezone()
+        start = views.parse_window_bound(start, tz) if start else timezone.now()
+        end = views.parse_window_bound(end, tz, end=True) if end else None
+    except (KeyError, ValueError):
+        return render(
+            {
+                'success':False,
+                'message':'Please provide ISO 8601 dates or datetimes and a valid time zone'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if end is not None and end <= start:
+        return render(
+            {
+                'success':False,
+                'message':'The end of the window must be after its start'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    message = 'Results for events within the requested window'
+    return await paginated_events(request, views.get_window(start, end), 'events', message, ('starts_at', 'id'))
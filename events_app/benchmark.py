@@ -0,0 +1,128 @@
+import datetime, logging, math, os, random, secrets, tempfile
+from .models import Event, Registration
+from .signals import events_bulk_created, registrations_bulk_created
+from accounts.models import User
+from contextlib import contextmanager
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction, DEFAULT_DB_ALIAS
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Runs the block against a freshly migrated throwaway copy of the default
+    database, the same way the test runner does, so benchmarks never touch
+    real data. SQLite copies live in a temporary file rather than in memory
+    so that every benchmark thread gets its own connection.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    # expected 4xx responses would otherwise be logged once per request
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+        try:
+            yield connection
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity)
+            teardown_test_environment()
+            request_logger.setLevel(level)
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+SEED_PASSWORD = 'benchmark-password'
+
+
+def seed_dataset(users, events, registrations_per_event=0, batch_size=5000, log=None):
+    """
+    Bulk-inserts users, events and registrations into the current database and
+    returns the created users and events. Every seeded user is verified and
+    has SEED_PASSWORD as password. Usernames, emails and phone numbers carry
+    a random run tag so the command can seed the same database again.
+    """
+    tag = secrets.randbelow(100000)
+    password = make_password(SEED_PASSWORD)
+    today = datetime.date.today()
+    log = log or (lambda message: None)
+
+    seeded_users = []
+    for start in range(0, users, batch_size):
+        seeded_users += User.objects.bulk_create([
+            User(
+                email=f'seed{tag}.{number}@example.com',
+                username=f'seed{tag}_{number}',
+                first_name='Seed',
+                last_name='User',
+                date_of_birth=datetime.date(1990, 1, 1),
+                phone_number=f'9{tag:05d}{number:08d}',
+                password=password,
+                is_verified=True,
+            ) for number in range(start, min(start + batch_size, users))
+        ])
+        log(f'{len(seeded_users)}/{users} users')
+
+    registrations_per_event = min(registrations_per_event, len(seeded_users))
+    seeded_events = []
+    for start in range(0, events, batch_size):
+        locations = random.choices(list(LOCATIONS), k=min(batch_size, events - start))
+        with transaction.atomic():
+            batch = Event.objects.bulk_create([
+                Event(
+                    name=f'{random.choice(EVENT_WORDS)} {random.choice(EVENT_KINDS)} {number}',
+                    description='Seeded event',
+                    location=location,
+                    # scattered up to about 50 km around the city
+                    latitude=LOCATIONS[location][0] + random.uniform(-0.45, 0.45),
+                    longitude=LOCATIONS[location][1] + random.uniform(-0.45, 0.45),
+                    date=today + datetime.timedelta(days=random.randint(-30, 365)),
+                    time=datetime.time(random.randint(8, 22), random.choice((0, 30))),
+                    ticket_price=random.choice((0, 0, 10, 25, 50, 100)),
+                    organizer=random.choice(seeded_users),
+                    registration_count=registrations_per_event,
+                ) for number, location in enumerate(locations, start)
+            ])
+            events_bulk_created.send(sender=Event, events=batch, using=router.db_for_write(Event))
+
+            registrations = Registration.objects.bulk_create([
+                Registration(user=user, event=event)
+                for event in batch for user in random.sample(seeded_users, registrations_per_event)
+            ], batch_size=batch_size)
+            registrations_bulk_created.send(
+                sender=Registration, registrations=registrations, using=router.db_for_write(Registration)
+            )
+        seeded_events += batch
+        log(f'{len(seeded_events)}/{events} events')
+
+    return seeded_users, seeded_events
+
+
+EVENT_WORDS = ['Summer', 'Night', 'Tech', 'Jazz', 'Food', 'Startup', 'Art', 'Book', 'Film', 'Garden']
+EVENT_KINDS = ['Festival', 'Meetup', 'Conference', 'Concert', 'Workshop', 'Fair', 'Party', 'Summit']
+# city -> (latitude, longitude) of its centre
+LOCATIONS = {
+    'Accra':(5.6037, -0.1870),
+    'Kumasi':(6.6885, -1.6244),
+    'Tamale':(9.4008, -0.8393),
+    'Takoradi':(4.8845, -1.7554),
+    'Cape Coast':(5.1053, -1.2466),
+    'Lagos':(6.5244, 3.3792),
+    'Nairobi':(-1.2921, 36.8219),
+    'London':(51.5072, -0.1276),
+    'Berlin':(52.5200, 13.4050),
+    'Toronto':(43.6532, -79.3832),
+}
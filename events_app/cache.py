@@ -0,0 +1,159 @@
+import asyncio, hashlib, time
+from .models import Event
+from core.routers import replica_alias
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.timezone import localdate
+from functools import wraps
+from rest_framework import status
+from rest_framework.response import Response
+
+
+GENERATION_KEY = 'events:generation'
+MODIFIED_KEY = 'events:modified'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # seeded from the clock so an evicted counter never reuses an old generation
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+async def aget_generation():
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = await cache.aget(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+    cache.set(MODIFIED_KEY, time.time(), timeout=None)
+
+
+def get_cache_key(request, view_name, kwargs, generation=None, vary=None):
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    raw = f"{request.build_absolute_uri('/')}|{sorted(kwargs.items())}|{params}|{vary(request) if vary else ''}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    if generation is None:
+        generation = get_generation()
+    # replicas may lag, so users pinned to the primary never get a response read from one
+    source = 'replica' if replica_alias.get() is not None else 'primary'
+    return f'events:response:{generation}:{source}:{view_name}:{digest}'
+
+
+def get_today(request):
+    return localdate().isoformat()
+
+
+def get_window_start(request):
+    # without ?from a window starts now, so its responses are only reused within the minute
+    return None if request.GET.get('from') else datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M')
+
+
+def get_facet_window_start(request):
+    return get_window_start(request) if request.GET.get('to') else None
+
+
+def cache_response(timeout=None, vary=None):
+    """
+    Caches successful GET responses of a read-only view, keyed by the view,
+    its URL kwargs and the normalized query string. Keys embed the current
+    generation, which is bumped whenever an event or registration changes,
+    so stale entries are never read again and simply expire. Views whose
+    results depend on the date or time pass vary, a function of the request
+    whose result is added to the key, such as get_today.
+
+    Sync views are DRF views and cache their response data; async views
+    return plain HttpResponses and cache the rendered body instead.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            key = get_cache_key(request, view_name, kwargs, vary=vary)
+            cached = cache.get(key)
+            if cached is not None:
+                data, status_code = cached
+                return Response(data, status=status_code)
+
+            response = view(request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+                cache.set(key, (response.data, response.status_code), timeout or settings.EVENT_CACHE_TIMEOUT)
+            return response
+
+        @wraps(view)
+        async def async_wrapped(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await view(request, *args, **kwargs)
+
+            key = get_cache_key(request, view_name, kwargs, generation=await aget_generation(), vary=vary)
+            cached = await cache.aget(key)
+            if cached is not None:
+                content, status_code = cached
+                return HttpResponse(content, status=status_code, content_type='application/json')
+
+            response = await view(request, *args, **kwargs)
+            if isinstance(response, HttpResponse) and response.status_code == status.HTTP_200_OK:
+                await cache.aset(key, (response.content, response.status_code), timeout or settings.EVENT_CACHE_TIMEOUT)
+            return response
+
+        return async_wrapped if asyncio.iscoroutinefunction(view) else wrapped
+    return decorator
+
+
+# Conditional GET support, used with django.views.decorators.http.condition so
+# that If-None-Match / If-Modified-Since are answered before the view runs.
+
+def get_event_metadata(request, event_id):
+    if not hasattr(request, '_event_metadata'):
+        request._event_metadata = Event.objects.filter(id=event_id).order_by().values_list(
+            'updated_at', 'organizer__username'
+        ).first()
+    return request._event_metadata
+
+
+async def aget_event_metadata(request, event_id):
+    # condition() calls the etag and last-modified functions synchronously, even around async views,
+    # so async views load the metadata up front and those functions find it on the request
+    if not hasattr(request, '_event_metadata'):
+        request._event_metadata = await Event.objects.filter(id=event_id).order_by().values_list(
+            'updated_at', 'organizer__username'
+        ).afirst()
+    return request._event_metadata
+
+
+def event_etag(request, event_id):
+    metadata = get_event_metadata(request, event_id)
+    if metadata is None:
+        return None
+    updated_at, organizer = metadata
+    return hashlib.md5(f'{event_id}|{updated_at.isoformat()}|{organizer}'.encode()).hexdigest()
+
+
+def event_last_modified(request, event_id):
+    metadata = get_event_metadata(request, event_id)
+    return metadata[0] if metadata is not None else None
+
+
+def list_etag(request, *args, **kwargs):
+    # the cache key changes with the query and with every generation bump
+    return hashlib.md5(get_cache_key(request, 'list', kwargs).encode()).hexdigest()
+
+
+def list_last_modified(request, *args, **kwargs):
+    modified = cache.get(MODIFIED_KEY)
+    return datetime.fromtimestamp(modified, tz=timezone.utc) if modified is not None else None
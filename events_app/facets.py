@@ -0,0 +1,100 @@
+"""
+Event counts per location, organizer and month, for the discovery UI.
+
+Counts over every event are read from EventFacetCount, which the Event
+signals keep up to date as events are created, changed and deleted. Counts
+over a search, filter or window are computed in a single grouped query
+over the matching events, grouped by every requested facet at once and
+rolled up per facet in Python.
+"""
+from .models import EventFacetCount
+from accounts.models import User
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+
+# facet -> expression grouped on by count_facets
+FACETS = {
+    'location':F('location'),
+    'organizer':F('organizer_id'),
+    'month':TruncMonth('date'),
+}
+
+# changes to these fields move an event between facet values
+FACET_FIELDS = {'location', 'organizer', 'date'}
+
+
+def get_facet_values(event):
+    return {
+        'location':event.location,
+        'organizer':str(event.organizer_id),
+        'month':format_month(event.date),
+    }
+
+
+def format_month(day):
+    return f'{day:%Y-%m}'
+
+
+def get_deltas(before=None, after=None):
+    deltas = Counter()
+    for values, sign in ((before, -1), (after, 1)):
+        for facet, value in (values or {}).items():
+            deltas[facet, value] += sign
+    return deltas
+
+
+def update_counts(deltas, using):
+    counts = EventFacetCount.objects.using(using)
+    # a fixed order keeps concurrent writers from deadlocking on each other's rows
+    for (facet, value), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        if counts.filter(facet=facet, value=value).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic(using=using):
+                counts.create(facet=facet, value=value, count=delta)
+        except IntegrityError:
+            # created by a concurrent writer in the meantime
+            counts.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+
+def count_facets(events, facets):
+    """Counts per value of each facet over the events queryset, in one grouped query."""
+    columns = {f'facet_{facet}':FACETS[facet] for facet in facets}
+    groups = events.order_by().values(**columns).annotate(events=Count('id'))
+
+    counts = {facet:Counter() for facet in facets}
+    total = 0
+    for group in groups:
+        total += group['events']
+        for facet in facets:
+            value = group[f'facet_{facet}']
+            counts[facet][format_month(value) if facet == 'month' else str(value)] += group['events']
+    return total, {facet:sorted(counts[facet].items(), key=lambda item: (-item[1], item[0])) for facet in facets}
+
+
+def read_facet_counts(facets, limit):
+    """Counts per value of each facet over every event, read from EventFacetCount."""
+    stored = EventFacetCount.objects.filter(count__gt=0)
+    # every event has exactly one month, so the month counts add up to the number of events
+    total = stored.filter(facet='month').aggregate(total=Sum('count'))['total'] or 0
+    counts = {
+        facet:list(stored.filter(facet=facet).order_by('-count', 'value').values_list('value', 'count')[:limit])
+        for facet in facets
+    }
+    return total, counts
+
+
+def render_facets(counts, limit):
+    counts = {facet:values[:limit] for facet, values in counts.items()}
+    if 'organizer' in counts:
+        organizer_ids = [value for value, count in counts['organizer']]
+        usernames = dict(User.objects.filter(id__in=organizer_ids).values_list('id', 'username'))
+        counts['organizer'] = [
+            (usernames[value], count) for value, count in counts['organizer'] if value in usernames
+        ]
+    return {facet:[{'value':value, 'count':count} for value, count in values] for facet, values in counts.items()}
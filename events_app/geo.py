@@ -0,0 +1,128 @@
+"""
+Proximity search on plain SQL, without a spatial extension.
+
+Every event with coordinates stores their geohash, which is a string where
+nearby points share prefixes, and the geohash column is indexed. A radius
+query first covers its bounding box with a few geohash cells. Each cell is a
+range seek on that index. The rows found are then narrowed to the bounding
+box, and exact great-circle distances are computed for what remains.
+"""
+import math
+from django.db.models import Q
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    value = 0
+    even = True
+    while len(geohash) < precision:
+        # bits alternate between longitude and latitude, longitude first
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            geohash.append(BASE32[value])
+            bits = value = 0
+    return ''.join(geohash)
+
+
+def get_cell_size(precision):
+    """Height and width of a geohash cell of this length, in degrees."""
+    bits = precision * 5
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def normalize_longitude(longitude):
+    return (longitude + 180) % 360 - 180
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def get_bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) around the circle. min_lng is larger
+    than max_lng when the box crosses the antimeridian, and the box spans
+    every longitude when it reaches a pole.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    if min_lat == -90.0 or max_lat == 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    lng_delta = lat_delta / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if lng_delta >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, normalize_longitude(longitude - lng_delta), normalize_longitude(longitude + lng_delta)
+
+
+def get_cover_cells(box, max_cells=16):
+    """The longest geohash prefixes, at most max_cells of them, that together cover the box."""
+    min_lat, max_lat, min_lng, max_lng = box
+    lng_span = 360 if (min_lng, max_lng) == (-180.0, 180.0) else (max_lng - min_lng) % 360
+
+    cells = {''}
+    for precision in range(1, PRECISION + 1):
+        height, width = get_cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        columns = min(math.ceil(lng_span / width) + 1, round(360 / width))
+        if rows * columns > max_cells:
+            break
+
+        candidates = set()
+        for row in range(rows):
+            latitude = min(min_lat + row * height, max_lat)
+            for column in range(columns + 1):
+                longitude = normalize_longitude(min_lng + min(column * width, lng_span))
+                candidates.add(encode(latitude, longitude, precision))
+            candidates.add(encode(latitude, max_lng, precision))
+        for column in range(columns + 1):
+            candidates.add(encode(max_lat, normalize_longitude(min_lng + min(column * width, lng_span)), precision))
+        if len(candidates) > max_cells:
+            break
+        cells = candidates
+    return sorted(cells)
+
+
+def get_near_filter(box, cells):
+    """Index range seeks over the cells, narrowed to the bounding box."""
+    min_lat, max_lat, min_lng, max_lng = box
+    in_cells = Q()
+    for cell in cells:
+        # every geohash starting with the cell sorts between it and the cell followed by '~'
+        in_cells |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+
+    condition = in_cells & Q(latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lng <= max_lng:
+        return condition & Q(longitude__gte=min_lng, longitude__lte=max_lng)
+    return condition & (Q(longitude__gte=min_lng) | Q(longitude__lte=max_lng))
+
+
+def rank_by_distance(rows, latitude, longitude, radius_km):
+    """The rows within radius_km, each with its distance, nearest first and then by id."""
+    ranked = []
+    for row in rows:
+        distance = distance_km(latitude, longitude, row['latitude'], row['longitude'])
+        if distance <= radius_km:
+            ranked.append(dict(row, distance=round(distance, 3)))
+    ranked.sort(key=lambda row: (row['distance'], str(row['id'])))
+    return ranked
@@ -0,0 +1,162 @@
+"""
+iCalendar feeds of the events a user registered for and of the events an
+organizer runs, for calendar apps that poll them every few minutes.
+
+A rendered feed is cached together with a version token for everything it
+depends on: the feed's owner, whose token changes when events join or leave
+the feed, and each of its events, whose token changes when the event does.
+The signals in events_app.signals replace those tokens once a change is
+committed. A poll only reads the cache while every token still matches.
+Otherwise the feed's events are queried again, and each VEVENT is re-rendered
+only if its event changed since it was last cached.
+"""
+import hashlib, secrets
+from .models import Event
+from accounts.models import User
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import router, transaction
+from datetime import timezone
+
+
+FEED_SALT = 'events_app.ical.user_feed'
+FEED_FIELDS = ['id', 'name', 'description', 'location', 'latitude', 'longitude', 'starts_at', 'updated_at']
+
+
+def get_user_feed_token(user_id):
+    return signing.Signer(salt=FEED_SALT).sign(user_id)
+
+
+def get_user_id(token):
+    try:
+        return signing.Signer(salt=FEED_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+
+
+def version_key(kind, pk):
+    return f'calendar:version:{kind}:{pk}'
+
+
+def bump_versions(keys, using):
+    # after commit, so a feed rebuilt meanwhile from the old rows is never cached under the new tokens
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({key:secrets.token_hex(8) for key in keys}, timeout=None), using=using)
+
+
+def get_versions(keys):
+    versions = cache.get_many(keys)
+    for key in set(keys) - versions.keys():
+        cache.add(key, secrets.token_hex(8), timeout=None)
+    if len(versions) < len(keys):
+        versions = cache.get_many(keys)
+    return versions
+
+
+def escape_text(value):
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def fold(line):
+    # content lines are at most 75 octets, continued on lines starting with a space
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        # never split a multi-byte character
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(encoded[:size].decode())
+        encoded = encoded[size:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_datetime(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_vevent(event):
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{event['id']}",
+        f"DTSTAMP:{format_datetime(event['updated_at'])}",
+        f"DTSTART:{format_datetime(event['starts_at'])}",
+        f"SUMMARY:{escape_text(event['name'])}",
+        f"DESCRIPTION:{escape_text(event['description'])}",
+        f"LOCATION:{escape_text(event['location'])}",
+    ]
+    if event['latitude'] is not None and event['longitude'] is not None:
+        lines.append(f"GEO:{event['latitude']};{event['longitude']}")
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def render_calendar(name, vevents):
+    header = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//event-management-api//Events//EN', 'CALSCALE:GREGORIAN']
+    header.append(f'X-WR-CALNAME:{escape_text(name)}')
+    return ''.join(fold(line) for line in header) + ''.join(vevents) + 'END:VCALENDAR\r\n'
+
+
+def build_feed(feed_key, owner_key, name, events):
+    """
+    Renders the feed from the events queryset, reusing every cached VEVENT
+    whose event is unchanged. Tokens are read around the rows: the owner's
+    before them, so membership changes made meanwhile invalidate the feed,
+    and the events' after them, checked against a second read of the rows.
+    """
+    owner_version = get_versions([owner_key])
+    rows = list(events.order_by('starts_at', 'id').values(*FEED_FIELDS))
+
+    # keyed by updated_at, read along with the rest of the row, so a fragment always matches its key
+    fragment_keys = {row['id']:f"calendar:vevent:{row['id']}:{row['updated_at'].isoformat()}" for row in rows}
+    fragments = cache.get_many(list(fragment_keys.values()))
+    rendered = {fragment_keys[row['id']]:render_vevent(row) for row in rows if fragment_keys[row['id']] not in fragments}
+    if rendered:
+        cache.set_many(rendered, timeout=settings.EVENT_CALENDAR_CACHE_TIMEOUT)
+        fragments.update(rendered)
+
+    body = render_calendar(name, [fragments[fragment_keys[row['id']]] for row in rows])
+    feed = {
+        'versions':{**owner_version, **get_versions([version_key('event', row['id']) for row in rows])},
+        'body':body,
+        'etag':hashlib.md5(body.encode()).hexdigest(),
+    }
+
+    # a change committed after the rows were read may already have replaced the tokens read above, so the feed is
+    # only cached if the primary still has the same events as they were read, which also covers a lagging replica
+    current = events.using(router.db_for_write(Event)).order_by().values_list('id', 'updated_at')
+    if dict(current) == {row['id']:row['updated_at'] for row in rows}:
+        cache.set(feed_key, feed, timeout=settings.EVENT_CALENDAR_CACHE_TIMEOUT)
+    return feed
+
+
+def get_cached_feed(feed_key):
+    feed = cache.get(feed_key)
+    if feed is not None and cache.get_many(list(feed['versions'])) == feed['versions']:
+        return feed
+    return None
+
+
+def get_user_feed(user_id):
+    feed_key = f'calendar:feed:user:{user_id}'
+    feed = get_cached_feed(feed_key)
+    if feed is None:
+        events = Event.objects.filter(registration__user_id=user_id)
+        feed = build_feed(feed_key, version_key('user', user_id), 'Registered events', events)
+    return feed
+
+
+def get_organizer_feed(username):
+    feed_key = f'calendar:feed:organizer:{hashlib.md5(username.encode()).hexdigest()}'
+    feed = get_cached_feed(feed_key)
+    if feed is None:
+        organizer_id = User.objects.filter(username=username).values_list('id', flat=True).first()
+        if organizer_id is None:
+            return None
+        events = Event.objects.filter(organizer_id=organizer_id)
+        feed = build_feed(feed_key, version_key('organizer', organizer_id), f'Events by {username}', events)
+    return feed
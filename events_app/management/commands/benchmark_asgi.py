@@ -0,0 +1,123 @@
+import asyncio, datetime, threading, time, types
+from accounts.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import path
+from events_app import async_views, views
+from events_app.benchmark import benchmark_database, percentile
+from events_app.models import Event
+
+
+def make_urlconf(read_views):
+    urlconf = types.ModuleType(f'benchmark_{read_views.__name__.replace(".", "_")}')
+    urlconf.urlpatterns = [
+        path('event/all', read_views.get_all_events_view),
+        path('event/search', read_views.search_events_view),
+        path('event/filter', read_views.filter_events_view),
+        path('event/next-month', read_views.events_within_next_month_view),
+        path('event/<uuid:event_id>', read_views.get_event_details_view),
+    ]
+    return urlconf
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares requests/sec and latency of the read endpoints served by the sync views through '
+        'the WSGI handler and by the async views through the ASGI handler, at the same concurrency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000, help='Events to seed')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per deployment')
+        parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once')
+        parser.add_argument('--with-cache', action='store_true', help='Leave the response cache on')
+
+    def handle(self, *args, **options):
+        timeout = None if options['with_cache'] else 0
+        with benchmark_database(), override_settings(EVENT_CACHE_TIMEOUT=timeout):
+            urls = self.seed(options['events'])
+            urls = [urls[index % len(urls)] for index in range(options['requests'])]
+
+            with override_settings(ROOT_URLCONF=make_urlconf(views)):
+                wsgi = self.run_wsgi(urls, options['concurrency'])
+            with override_settings(ROOT_URLCONF=make_urlconf(async_views)):
+                asgi = asyncio.run(self.run_asgi(urls, options['concurrency']))
+
+        self.stdout.write(f"{options['requests']} requests at concurrency {options['concurrency']} on {connection.vendor}")
+        for label, (elapsed, latencies, errors) in (('WSGI (sync views)', wsgi), ('ASGI (async views)', asgi)):
+            self.stdout.write(
+                f'{label:<20} {len(latencies) / elapsed:8.1f} req/s   '
+                f'p50 {percentile(latencies, 50) * 1000:7.1f}ms   '
+                f'p99 {percentile(latencies, 99) * 1000:7.1f}ms   errors {errors}'
+            )
+
+    def seed(self, event_count):
+        organizer = User.objects.create(
+            id='bench000',
+            email='bench@example.com',
+            username='bench',
+            first_name='Bench',
+            last_name='User',
+            date_of_birth=datetime.date(1990, 1, 1),
+            phone_number='0000000000',
+            is_verified=True,
+        )
+        today = datetime.date.today()
+        events = Event.objects.bulk_create([
+            Event(
+                name=f'Event {number}',
+                description='Benchmark event',
+                location=f'City {number % 50}',
+                date=today + datetime.timedelta(days=number % 60),
+                time=datetime.time(number % 24, 0),
+                organizer=organizer,
+            ) for number in range(event_count)
+        ], batch_size=1000)
+
+        return [
+            '/event/all',
+            '/event/search?query=event',
+            '/event/filter?location=City%207',
+            '/event/next-month',
+            f'/event/{events[0].id}',
+        ]
+
+    def run_wsgi(self, urls, concurrency):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(batch):
+            client = Client(raise_request_exception=False)
+            for url in batch:
+                began = time.perf_counter()
+                response = client.get(url)
+                with lock:
+                    latencies.append(time.perf_counter() - began)
+                    errors.append(response.status_code >= 500)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(urls[index::concurrency],)) for index in range(concurrency)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - began, latencies, sum(errors)
+
+    async def run_asgi(self, urls, concurrency):
+        latencies = []
+        errors = []
+
+        async def worker(batch):
+            client = AsyncClient(raise_request_exception=False)
+            for url in batch:
+                began = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - began)
+                errors.append(response.status_code >= 500)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker(urls[index::concurrency]) for index in range(concurrency)))
+        return time.perf_counter() - began, latencies, sum(errors)
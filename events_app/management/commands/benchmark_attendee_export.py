@@ -0,0 +1,68 @@
+import datetime, time, tracemalloc
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from events_app.benchmark import benchmark_database, seed_dataset
+from events_app.models import Event, Registration
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Registers many users for one event and streams its attendee export, reporting throughput and peak memory '
+        'for a tenth of the attendees and for all of them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attendees', type=int, default=200000, help='Users registered for the event')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert while seeding')
+
+    def handle(self, *args, **options):
+        attendees = options['attendees']
+        with benchmark_database():
+            self.stdout.write(f'Seeding {attendees} attendees...')
+            users, _ = seed_dataset(attendees, 0, batch_size=options['batch_size'])
+            organizer = users[0]
+            small = self.create_event(organizer, users[:max(attendees // 10, 1)], options['batch_size'])
+            large = self.create_event(organizer, users, options['batch_size'])
+
+            client = Client()
+            headers = {'Authorization':f'Bearer {AccessToken.for_user(organizer)}'}
+            for export in ('csv', 'ndjson'):
+                for event, count in ((small, max(attendees // 10, 1)), (large, attendees)):
+                    self.measure(client, headers, event, count, export)
+
+    def create_event(self, organizer, users, batch_size):
+        event = Event.objects.create(
+            name='Sold out show',
+            description='Benchmark event',
+            location='Accra',
+            time=datetime.time(20, 0),
+            organizer=organizer,
+        )
+        Registration.objects.bulk_create([Registration(user=user, event=event) for user in users], batch_size=batch_size)
+        return event
+
+    def measure(self, client, headers, event, count, export):
+        url = reverse('event_attendees', args=[event.id]) + f'?export={export}'
+        began = time.perf_counter()
+        size, lines = self.download(client, url, headers)
+        elapsed = time.perf_counter() - began
+
+        # measured on a second download, tracing would distort the timing above
+        tracemalloc.start()
+        self.download(client, url, headers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f'{export} with {count} attendees: {lines} lines, {size / 1024 / 1024:.1f} MiB in {elapsed:.2f}s '
+            f'({count / elapsed:.0f} rows/s), peak memory {peak / 1024 / 1024:.1f} MiB'
+        )
+
+    def download(self, client, url, headers):
+        size = lines = 0
+        for chunk in client.get(url, headers=headers).streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+        return size, lines
@@ -0,0 +1,133 @@
+import datetime, json, os, random, subprocess, sys, threading, time
+from accounts.models import User
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from events_app.benchmark import benchmark_database, percentile
+from events_app.models import Event
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+# Environment that reproduces the old settings: Django's SQLite backend, a new
+# connection per request and the rollback journal
+LEGACY_PROFILE = {
+    'DB_ENGINE': 'django.db.backends.sqlite3',
+    'DB_CONN_MAX_AGE': '0',
+    'DB_CONN_HEALTH_CHECKS': 'false',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs a mixed read/write workload (event listings and registrations) from many threads under the '
+        'legacy database settings and under the current profile, and compares throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent client threads')
+        parser.add_argument('--requests', type=int, default=3000, help='Requests per profile')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of requests that register')
+        parser.add_argument('--events', type=int, default=200, help='Events to seed')
+        parser.add_argument('--profile', choices=['both', 'legacy', 'current'], default='both')
+
+    def handle(self, *args, **options):
+        if options['profile'] != 'both':
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        # the profile is read from the environment when settings load, so each one runs in its own process
+        for label, overrides in (('legacy', LEGACY_PROFILE), ('current', {})):
+            command = [
+                sys.executable, sys.argv[0], 'benchmark_db_profile', '--profile', label,
+                '--threads', str(options['threads']), '--requests', str(options['requests']),
+                '--write-ratio', str(options['write_ratio']), '--events', str(options['events']),
+            ]
+            output = subprocess.run(
+                command, env={**os.environ, **overrides}, capture_output=True, text=True, check=True
+            ).stdout
+            self.report(label, json.loads(output.strip().splitlines()[-1]))
+
+    def report(self, label, result):
+        self.stdout.write(
+            f"{label:<8} {result['engine']:<28} {result['requests'] / result['elapsed']:8.1f} req/s   "
+            f"read p99 {result['read_p99'] * 1000:7.1f}ms   write p99 {result['write_p99'] * 1000:7.1f}ms   "
+            f"errors {result['errors']}"
+        )
+
+    def run(self, options):
+        with benchmark_database(), override_settings(EVENT_CACHE_TIMEOUT=0):
+            plan = self.seed(options)
+            elapsed, reads, writes, errors = self.hammer(plan, options['threads'])
+
+        return {
+            'engine':settings.DATABASES['default']['ENGINE'],
+            'requests':len(reads) + len(writes),
+            'elapsed':elapsed,
+            'read_p99':percentile(reads, 99),
+            'write_p99':percentile(writes, 99),
+            'errors':errors,
+        }
+
+    def seed(self, options):
+        writes = int(options['requests'] * options['write_ratio'])
+        users = User.objects.bulk_create([
+            User(
+                email=f'bench{number}@example.com',
+                username=f'bench{number}',
+                first_name='Bench',
+                last_name='User',
+                date_of_birth=datetime.date(1990, 1, 1),
+                phone_number=f'{number:010d}',
+                is_verified=True,
+            ) for number in range(max(writes, 1))
+        ])
+        today = datetime.date.today()
+        events = Event.objects.bulk_create([
+            Event(
+                name=f'Event {number}',
+                description='Benchmark event',
+                location='Accra',
+                date=today + datetime.timedelta(days=number % 30),
+                time=datetime.time(18, 0),
+                organizer=users[0],
+            ) for number in range(options['events'])
+        ])
+
+        # every write registers a different user, so none of them are rejected as duplicates
+        plan = [
+            ('post', f'/event/{random.choice(events).id}/register', f'Bearer {AccessToken.for_user(user)}')
+            for user in users[:writes]
+        ]
+        plan += [('get', '/event/all', None)] * (options['requests'] - writes)
+        random.shuffle(plan)
+        return plan
+
+    def hammer(self, plan, thread_count):
+        reads = []
+        writes = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(thread_count + 1)
+
+        def worker(batch):
+            client = Client(raise_request_exception=False)
+            start.wait()
+            for method, url, token in batch:
+                headers = {'HTTP_AUTHORIZATION':token} if token else {}
+                began = time.perf_counter()
+                response = getattr(client, method)(url, **headers)
+                elapsed = time.perf_counter() - began
+                with lock:
+                    (writes if method == 'post' else reads).append(elapsed)
+                    errors.append(response.status_code >= 500)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(plan[index::thread_count],)) for index in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - began, reads, writes, sum(errors)
@@ -0,0 +1,90 @@
+import random, time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from events_app import geo
+from events_app.benchmark import LOCATIONS, benchmark_database, percentile, seed_dataset
+from events_app.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds events scattered around a few cities and compares proximity queries served from the geohash index '
+        'with a scan of every event, and times the /event/near endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000000, help='Events to seed')
+        parser.add_argument('--queries', type=int, default=50, help='Proximity queries per strategy')
+        parser.add_argument('--radius', type=float, default=10, help='Search radius in km')
+        parser.add_argument('--scan-queries', type=int, default=5, help='Queries answered by scanning every event')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stdout.write(f"Seeding {options['events']} events...")
+            seed_dataset(100, options['events'], log=lambda message: self.stdout.write(f'  {message}'))
+
+            # points around the seeded cities, where the events are
+            random.seed(0)
+            points = [
+                (latitude + random.uniform(-0.3, 0.3), longitude + random.uniform(-0.3, 0.3))
+                for latitude, longitude in random.choices(list(LOCATIONS.values()), k=options['queries'])
+            ]
+            radius = options['radius']
+
+            self.stdout.write(f'Database: {connection.vendor}')
+            self.explain(*points[0], radius)
+
+            indexed, found = self.time(points, radius, self.near_indexed)
+            self.report('Geohash index', indexed, found)
+
+            scanned, scan_found = self.time(points[:options['scan_queries']], radius, self.near_scan)
+            self.report('Full scan', scanned, scan_found)
+            if found[:len(scan_found)] != scan_found:
+                self.stdout.write(self.style.ERROR('The index and the scan found different events'))
+
+            client = Client()
+            latencies = []
+            for latitude, longitude in points:
+                began = time.perf_counter()
+                client.get(reverse('events_near'), {'lat':latitude, 'lng':longitude, 'radius':radius})
+                latencies.append(time.perf_counter() - began)
+            self.report('GET /event/near (first page)', latencies)
+
+        speedup = percentile(scanned, 50) / max(percentile(indexed, 50), 1e-9)
+        self.stdout.write(self.style.SUCCESS(f'Median speedup of the index over the scan: {speedup:.0f}x'))
+
+    def near_indexed(self, latitude, longitude, radius):
+        box = geo.get_bounding_box(latitude, longitude, radius)
+        candidates = Event.objects.filter(geo.get_near_filter(box, geo.get_cover_cells(box)))
+        return geo.rank_by_distance(candidates.order_by().values('id', 'latitude', 'longitude'), latitude, longitude, radius)
+
+    def near_scan(self, latitude, longitude, radius):
+        candidates = Event.objects.filter(latitude__isnull=False).order_by().values('id', 'latitude', 'longitude')
+        return geo.rank_by_distance(candidates.iterator(chunk_size=10000), latitude, longitude, radius)
+
+    def time(self, points, radius, near):
+        latencies = []
+        found = []
+        for latitude, longitude in points:
+            began = time.perf_counter()
+            events = near(latitude, longitude, radius)
+            latencies.append(time.perf_counter() - began)
+            found.append(len(events))
+        return latencies, found
+
+    def report(self, label, latencies, found=None):
+        line = f'{label}: p50 {percentile(latencies, 50) * 1000:.1f}ms, p99 {percentile(latencies, 99) * 1000:.1f}ms'
+        if found:
+            line += f', {sum(found) / len(found):.0f} events per query'
+        self.stdout.write(line)
+
+    def explain(self, latitude, longitude, radius):
+        box = geo.get_bounding_box(latitude, longitude, radius)
+        cells = geo.get_cover_cells(box)
+        candidates = Event.objects.filter(geo.get_near_filter(box, cells)).order_by().values('id', 'latitude', 'longitude')
+        self.stdout.write(f'Cells covering a {radius} km radius: {", ".join(cells)}')
+        self.stdout.write('Query plan:')
+        for line in candidates.explain().splitlines():
+            self.stdout.write(f'  {line}')
@@ -0,0 +1,90 @@
+import datetime, threading, time
+from accounts.models import User
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from events_app.benchmark import benchmark_database, percentile
+from events_app.models import Event, Registration
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = 'Hammers registration for a single event from many threads and reports throughput and overselling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help='Number of users competing for seats')
+        parser.add_argument('--capacity', type=int, default=100, help='Seats available on the event')
+        parser.add_argument('--threads', type=int, default=50, help='Concurrent client threads')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            event, tokens = self.seed(options['users'], options['capacity'])
+            results = self.hammer(event, tokens, options['threads'])
+
+            registrations = Registration.objects.filter(event=event).count()
+            event.refresh_from_db()
+
+        elapsed, statuses, latencies = results
+        total = sum(statuses.values())
+        oversold = max(registrations - options['capacity'], 0)
+
+        self.stdout.write(f"Database: {connection.vendor}")
+        self.stdout.write(f"Requests: {total} from {options['threads']} threads in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+        self.stdout.write(f"Latency: p50 {percentile(latencies, 50) * 1000:.1f}ms, p99 {percentile(latencies, 99) * 1000:.1f}ms")
+        self.stdout.write(f"Responses: {dict(sorted(statuses.items()))}")
+        self.stdout.write(f"Registrations: {registrations}, registration_count: {event.registration_count}")
+
+        style = self.style.ERROR if oversold or registrations != event.registration_count else self.style.SUCCESS
+        self.stdout.write(style(f"Oversold: {oversold}"))
+
+    def seed(self, user_count, capacity):
+        users = User.objects.bulk_create([
+            User(
+                id=f'b{number:07d}',
+                email=f'bench{number}@example.com',
+                username=f'bench{number}',
+                first_name='Bench',
+                last_name='User',
+                date_of_birth=datetime.date(1990, 1, 1),
+                phone_number=f'{number:010d}',
+                is_verified=True,
+            ) for number in range(user_count)
+        ])
+        event = Event.objects.create(
+            name='Ticket drop',
+            description='Benchmark event',
+            location='Accra',
+            time=datetime.time(20, 0),
+            capacity=capacity,
+            organizer=users[0],
+        )
+        return event, [str(AccessToken.for_user(user)) for user in users]
+
+    def hammer(self, event, tokens, thread_count):
+        url = f'/event/{event.id}/register'
+        statuses = Counter()
+        latencies = []
+        lock = threading.Lock()
+        start = threading.Barrier(thread_count + 1)
+
+        def worker(batch):
+            client = Client(raise_request_exception=False)
+            start.wait()
+            for token in batch:
+                began = time.perf_counter()
+                response = client.post(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+                elapsed = time.perf_counter() - began
+                with lock:
+                    statuses[response.status_code] += 1
+                    latencies.append(elapsed)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(tokens[index::thread_count],)) for index in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - began, statuses, latencies
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from events_app.cache import bump_generation
+from events_app.facets import FACETS, count_facets
+from events_app.models import Event, EventFacetCount
+
+
+class Command(BaseCommand):
+    help = 'Recounts events per facet value and repairs EventFacetCount wherever it has drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted counts without fixing them')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # locks the counts so signals from concurrent writes wait for the rebuild instead of being lost
+            rows = EventFacetCount.objects.select_for_update().order_by('facet', 'value')
+            stored = {(row.facet, row.value):row for row in rows}
+            total, counts = count_facets(Event.objects.all(), list(FACETS))
+            actual = {(facet, value):count for facet, values in counts.items() for value, count in values}
+
+            drifted = sorted(
+                key for key in stored.keys() | actual.keys()
+                if (stored[key].count if key in stored else 0) != actual.get(key, 0)
+            )
+            if drifted and not options['dry_run']:
+                EventFacetCount.objects.bulk_create([
+                    EventFacetCount(facet=facet, value=value, count=actual[facet, value])
+                    for facet, value in drifted if (facet, value) not in stored
+                ])
+                changed = [stored[key] for key in drifted if key in stored]
+                for row in changed:
+                    row.count = actual.get((row.facet, row.value), 0)
+                EventFacetCount.objects.bulk_update(changed, ['count'], batch_size=1000)
+
+        if drifted and not options['dry_run']:
+            bump_generation()
+
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Counted {total} events, {action} {len(drifted)} drifted facet counts'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from events_app.cache import bump_generation
+from events_app.models import Event, Registration
+
+
+class Command(BaseCommand):
+    help = 'Recounts registrations and repairs Event.registration_count wherever it has drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Events checked per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted events without fixing them')
+
+    def handle(self, *args, **options):
+        registrations = Registration.objects.filter(event=OuterRef('pk')).order_by().values('event')
+        actual = Coalesce(Subquery(registrations.annotate(count=Count('id')).values('count')), 0)
+
+        checked = drifted = 0
+        last_id = None
+        while True:
+            events = Event.objects.order_by('id')
+            if last_id is not None:
+                events = events.filter(id__gt=last_id)
+            event_ids = list(events.values_list('id', flat=True)[:options['chunk_size']])
+            if not event_ids:
+                break
+
+            drifted_ids = list(
+                Event.objects.filter(id__in=event_ids).annotate(actual=actual)
+                .exclude(registration_count=F('actual')).values_list('id', flat=True)
+            )
+            if drifted_ids and not options['dry_run']:
+                # recounted inside the UPDATE itself so registrations made meanwhile are not lost
+                Event.objects.filter(id__in=drifted_ids).update(registration_count=actual, updated_at=timezone.now())
+
+            checked += len(event_ids)
+            drifted += len(drifted_ids)
+            last_id = event_ids[-1]
+
+        if drifted and not options['dry_run']:
+            bump_generation()
+
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} events, {action} {drifted} drifted counts'))
@@ -0,0 +1,308 @@
+import datetime, json, statistics, subprocess, time, tracemalloc, urllib.error, urllib.request
+from accounts import urls as accounts_urls
+from accounts.models import User
+from collections import Counter
+from contextlib import ExitStack, nullcontext
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from events_app import urls as events_urls
+from events_app.benchmark import SEED_PASSWORD, benchmark_database, percentile, seed_dataset
+from events_app.ical import get_user_feed_token
+from events_app.models import Event
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+
+def event_payload(index):
+    return {
+        'name':f'Benchmark event {index}',
+        'description':'Created by run_benchmarks',
+        'location':'Accra',
+        'date':(datetime.date.today() + datetime.timedelta(days=index % 60)).isoformat(),
+        'time':'18:00',
+    }
+
+
+# One request per call for every named URL in events_app/urls.py and accounts/urls.py:
+# url name -> function(context, index) returning (method, path, body, user to authenticate as)
+SCENARIOS = {
+    'get_all_events':lambda ctx, i: ('get', reverse('get_all_events'), None, None),
+    'get_event_details':lambda ctx, i: (
+        'get', reverse('get_event_details', args=[ctx['events'][i % len(ctx['events'])].id]), None, None
+    ),
+    'search_events':lambda ctx, i: ('get', reverse('search_events') + '?query=festival', None, None),
+    'filter_events':lambda ctx, i: ('get', reverse('filter_events') + '?location=accra', None, None),
+    'event_facets':lambda ctx, i: ('get', reverse('event_facets') + ('?location=accra' if i % 2 else ''), None, None),
+    'events_near':lambda ctx, i: ('get', reverse('events_near') + '?lat=5.6037&lng=-0.1870&radius=10', None, None),
+    'events_within_next_7_days':lambda ctx, i: ('get', reverse('events_within_next_7_days'), None, None),
+    'events_within_next_month':lambda ctx, i: ('get', reverse('events_within_next_month'), None, None),
+    'events_within_window':lambda ctx, i: (
+        'get', reverse('events_within_window') + f'?to={datetime.date.today() + datetime.timedelta(days=90)}', None, None
+    ),
+    'calendar_feeds':lambda ctx, i: ('get', reverse('calendar_feeds'), None, ctx['users'][i % len(ctx['users'])]),
+    'user_calendar':lambda ctx, i: (
+        'get', reverse('user_calendar', args=[get_user_feed_token(ctx['users'][i % len(ctx['users'])].pk)]), None, None
+    ),
+    'organizer_calendar':lambda ctx, i: (
+        'get', reverse('organizer_calendar', args=[ctx['events'][i % len(ctx['events'])].organizer.username]), None, None
+    ),
+    'get_all_users':lambda ctx, i: ('get', reverse('get_all_users'), None, ctx['staff']),
+    'login_user':lambda ctx, i: (
+        'post', reverse('login_user'), {'email':ctx['users'][i % len(ctx['users'])].email, 'password':SEED_PASSWORD}, None
+    ),
+    'verify_user':lambda ctx, i: (
+        'get', reverse('verify_user') + f"?token={RefreshToken.for_user(ctx['users'][i % len(ctx['users'])])}", None, None
+    ),
+    'register_user':lambda ctx, i: ('post', reverse('register_user'), {
+        'username':f'bench_{ctx["run"]}_{i}',
+        'email':f'bench.{ctx["run"]}.{i}@example.com',
+        'password':'benchmark-password',
+        'first_name':'Bench',
+        'middle_name':'',
+        'last_name':'User',
+        'phone_number':f'8{ctx["run"]}{i:07d}',
+        'date_of_birth':'1990-01-01',
+    }, None),
+    'password_reset':lambda ctx, i: (
+        'post', reverse('password_reset'), {'email':ctx['users'][i % len(ctx['users'])].email}, None
+    ),
+    'password_reset_confirm':lambda ctx, i: ('patch', reverse('password_reset_confirm'), {
+        'uid':urlsafe_base64_encode(force_bytes(ctx['users'][-1 - i % len(ctx['users'])].pk)),
+        'token':default_token_generator.make_token(User.objects.get(pk=ctx['users'][-1 - i % len(ctx['users'])].pk)),
+        'password':SEED_PASSWORD,
+    }, None),
+    'create_event':lambda ctx, i: ('post', reverse('create_event'), event_payload(i), ctx['staff']),
+    'bulk_create_events':lambda ctx, i: (
+        'post', reverse('bulk_create_events'), [event_payload(i * 10 + j) for j in range(10)], ctx['staff']
+    ),
+    'update_event':lambda ctx, i: (
+        'patch', reverse('update_event', args=[ctx['owned'][i % len(ctx['owned'])].id]), {'location':f'Kumasi {i}'}, ctx['staff']
+    ),
+    'register_for_event':lambda ctx, i: (
+        'post', reverse('register_for_event', args=[ctx['target'].id]), None, ctx['users'][i % len(ctx['users'])]
+    ),
+    'bulk_register_for_event':lambda ctx, i: (
+        'post', reverse('bulk_register_for_event', args=[ctx['bulk_target'].id]),
+        {'users':[user.pk for user in ctx['users'][i * 10 % len(ctx['users']):][:10]]}, ctx['staff']
+    ),
+    'event_attendees':lambda ctx, i: (
+        'get', reverse('event_attendees', args=[ctx['events'][i % len(ctx['events'])].id]), None, ctx['staff']
+    ),
+    'delete_event':lambda ctx, i: ('delete', reverse('delete_event', args=[ctx['owned'][i].id]), None, ctx['staff']),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a dataset and drives every URL in events_app/urls.py and accounts/urls.py, recording latency '
+        'percentiles, query counts and peak memory per endpoint into a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to seed')
+        parser.add_argument('--events', type=int, default=10000, help='Events to seed')
+        parser.add_argument('--registrations-per-event', type=int, default=5, help='Seeded users registered per event')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint')
+        parser.add_argument('--only', default='', help='Comma-separated URL names to run, all of them by default')
+        parser.add_argument('--output', default='benchmark-report.json', help='Where to write the JSON report')
+        parser.add_argument(
+            '--server', default='',
+            help='Base URL of a running server to drive instead of the test client, needs --allow-writes',
+        )
+        parser.add_argument(
+            '--existing-data', action='store_true',
+            help='Use the current database instead of a seeded copy, needs --allow-writes',
+        )
+        parser.add_argument(
+            '--allow-writes', action='store_true',
+            help='Allow --existing-data and --server to permanently add users, events and registrations to the '
+            'configured database and update or delete the events they add',
+        )
+        parser.add_argument('--with-cache', action='store_true', help='Leave the response cache on')
+
+    def handle(self, *args, **options):
+        names = [pattern.name for pattern in events_urls.urlpatterns + accounts_urls.urlpatterns]
+        if options['only']:
+            names = [name for name in names if name in options['only'].split(',')]
+
+        # a server reads the configured database, so it can only be benchmarked against that one
+        use_existing = options['existing_data'] or options['server']
+        if use_existing and not options['allow_writes']:
+            raise SystemExit(
+                'The benchmark writes to the configured database with --existing-data or --server, '
+                'pass --allow-writes to run it anyway'
+            )
+        timeout = None if options['with_cache'] else 0
+        with ExitStack() as stack:
+            if not use_existing:
+                stack.enter_context(benchmark_database())
+            elif not options['server']:
+                # lets the test client's host through ALLOWED_HOSTS
+                setup_test_environment()
+                stack.callback(teardown_test_environment)
+            stack.enter_context(override_settings(EVENT_CACHE_TIMEOUT=timeout))
+            if not options['with_cache']:
+                stack.enter_context(override_settings(EVENT_CALENDAR_CACHE_TIMEOUT=0))
+
+            context = self.prepare(options, use_existing)
+            endpoints = {}
+            for name in names:
+                if name not in SCENARIOS:
+                    continue
+                self.stdout.write(f'{name}...', ending=' ')
+                endpoints[name] = self.measure(SCENARIOS[name], context, options['requests'], options['server'])
+                self.stdout.write(
+                    f"p50 {endpoints[name]['latency_ms']['p50']}ms, p99 {endpoints[name]['latency_ms']['p99']}ms"
+                )
+            vendor = connection.vendor
+
+        report = {
+            'meta':{
+                'commit':self.get_commit(),
+                'created_at':datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'database':vendor,
+                'mode':'server' if options['server'] else 'test client',
+                'dataset':{
+                    'users':len(context['users']),
+                    'events':Event.objects.count() if use_existing else options['events'],
+                    'registrations_per_event':None if use_existing else options['registrations_per_event'],
+                },
+                'requests_per_endpoint':options['requests'],
+                'response_cache':options['with_cache'],
+            },
+            'endpoints':endpoints,
+            'skipped':sorted(name for name in names if name not in SCENARIOS),
+        }
+        with open(options['output'], 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def prepare(self, options, use_existing):
+        count = options['requests']
+        if use_existing:
+            users = list(User.objects.filter(username__startswith='seed', is_verified=True)[:max(count * 10, 100)])
+            events = list(Event.objects.order_by('-created_at')[:1000])
+            if not users or not events:
+                raise SystemExit('Run seed_data first, the benchmark needs seeded users and events')
+        else:
+            users, events = seed_dataset(options['users'], options['events'], options['registrations_per_event'])
+
+        run = int(time.time()) % 100000
+        staff = User.objects.create(
+            email=f'bench.staff.{run}@example.com',
+            username=f'bench_staff_{run}',
+            first_name='Bench',
+            last_name='Staff',
+            date_of_birth=datetime.date(1990, 1, 1),
+            phone_number=f'7{run:05d}00000',
+            is_verified=True,
+            is_staff=True,
+        )
+        owned = Event.objects.bulk_create([
+            Event(
+                name=f'Benchmark event {index}',
+                description='Created by run_benchmarks',
+                location='Accra',
+                time=datetime.time(18, 0),
+                organizer=staff,
+            ) for index in range(count + 3)
+        ])
+        # one event per request (plus one for the memory run) to update and delete, and one each for the single and
+        # the bulk registrations
+        owned, target, bulk_target = owned[:count + 1], owned[count + 1], owned[count + 2]
+        return {
+            'run':f'{run:05d}',
+            'users':users,
+            'events':events,
+            'staff':staff,
+            'owned':owned,
+            'target':target,
+            'bulk_target':bulk_target,
+        }
+
+    def measure(self, scenario, context, count, server):
+        client = Client(raise_request_exception=False)
+        send = self.send_to_server if server else self.send_to_client
+        latencies = []
+        queries = []
+        statuses = Counter()
+
+        for index in range(count):
+            method, path, body, user = scenario(context, index)
+            capture = CaptureQueriesContext(connection) if not server else nullcontext()
+            with capture:
+                began = time.perf_counter()
+                status_code = send(client if not server else server, method, path, body, user)
+                latencies.append(time.perf_counter() - began)
+            statuses[status_code] += 1
+            if not server:
+                queries.append(len(capture.captured_queries))
+        connections.close_all()
+
+        peak_memory = None
+        if not server:
+            # measured on one extra request, tracing would distort the latencies above
+            method, path, body, user = scenario(context, count)
+            tracemalloc.start()
+            send(client, method, path, body, user)
+            peak_memory = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+
+        return {
+            'method':method.upper(),
+            'requests':count,
+            'statuses':{str(code):number for code, number in sorted(statuses.items())},
+            'latency_ms':{
+                'mean':round(statistics.mean(latencies) * 1000, 2),
+                'p50':round(percentile(latencies, 50) * 1000, 2),
+                'p90':round(percentile(latencies, 90) * 1000, 2),
+                'p99':round(percentile(latencies, 99) * 1000, 2),
+                'max':round(max(latencies) * 1000, 2),
+            },
+            'queries':{
+                'min':min(queries),
+                'median':statistics.median(queries),
+                'max':max(queries),
+            } if queries else None,
+            'peak_memory_kb':peak_memory,
+        }
+
+    def get_headers(self, user):
+        return {'Authorization':f'Bearer {AccessToken.for_user(user)}'} if user is not None else {}
+
+    def send_to_client(self, client, method, path, body, user):
+        response = getattr(client, method)(
+            path, data=json.dumps(body) if body is not None else None, content_type='application/json',
+            headers=self.get_headers(user),
+        )
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return response.status_code
+
+    def send_to_server(self, server, method, path, body, user):
+        request = urllib.request.Request(
+            server.rstrip('/') + path,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={'Content-Type':'application/json', **self.get_headers(user)},
+            method=method.upper(),
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from events_app.benchmark import SEED_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    help = 'Bulk-seeds users, events and registrations into the current database for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create')
+        parser.add_argument('--events', type=int, default=10000, help='Events to create')
+        parser.add_argument('--registrations-per-event', type=int, default=5, help='Seeded users registered per event')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per query')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            self.stderr.write('At least one user is needed to organize the events')
+            return
+
+        began = time.perf_counter()
+        users, events = seed_dataset(
+            options['users'],
+            options['events'],
+            options['registrations_per_event'],
+            options['batch_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users and {len(events)} events in {time.perf_counter() - began:.1f}s. '
+            f'Seeded users log in with the password {SEED_PASSWORD!r}'
+        ))
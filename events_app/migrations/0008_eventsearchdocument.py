@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE events_app_event_fts USING fts5("
+            "name, location, organizer, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE events_app_eventsearchdocument ADD COLUMN document tsvector')
+        schema_editor.execute(
+            'CREATE INDEX events_app_eventsearchdocument_document_idx '
+            'ON events_app_eventsearchdocument USING GIN (document)'
+        )
+    else:
+        return
+
+    schema_editor.execute('INSERT INTO events_app_eventsearchdocument (event_id) SELECT id FROM events_app_event')
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            'INSERT INTO events_app_event_fts (rowid, name, location, organizer) '
+            'SELECT d.id, e.name, e.location, u.username FROM events_app_eventsearchdocument d '
+            'JOIN events_app_event e ON e.id = d.event_id '
+            'JOIN accounts_user u ON u.id = e.organizer_id'
+        )
+    else:
+        schema_editor.execute(
+            "UPDATE events_app_eventsearchdocument d SET document = "
+            "setweight(to_tsvector('simple', e.name), 'A') || "
+            "setweight(to_tsvector('simple', e.location), 'B') || "
+            "setweight(to_tsvector('simple', u.username), 'C') "
+            "FROM events_app_event e JOIN accounts_user u ON u.id = e.organizer_id "
+            "WHERE e.id = d.event_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS events_app_event_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_user_phone_number'),
+        ('events_app', '0007_alter_registration_date_registered'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='events_app.event')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:11
+
+from datetime import datetime
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_starts_at(apps, schema_editor):
+    Event = apps.get_model('events_app', 'Event')
+    events = Event.objects.using(schema_editor.connection.alias)
+    tz = timezone.get_default_timezone()
+
+    batch = []
+    for event in events.only('id', 'date', 'time').iterator(chunk_size=2000):
+        event.starts_at = timezone.make_aware(datetime.combine(event.date, event.time), tz)
+        batch.append(event)
+        if len(batch) == 2000:
+            events.bulk_update(batch, ['starts_at'])
+            batch = []
+    events.bulk_update(batch, ['starts_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0008_eventsearchdocument'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_starts_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['starts_at', 'id'], name='events_app_event_starts_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def populate_updated_at(apps, schema_editor):
+    Event = apps.get_model('events_app', 'Event')
+    Event.objects.using(schema_editor.connection.alias).update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0009_event_starts_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def deduplicate_registrations(apps, schema_editor):
+    Registration = apps.get_model('events_app', 'Registration')
+    registrations = Registration.objects.using(schema_editor.connection.alias)
+
+    first_ids = registrations.values('user', 'event').annotate(first_id=models.Min('id')).values('first_id')
+    registrations.exclude(id__in=first_ids).delete()
+
+
+def count_registrations(apps, schema_editor):
+    Event = apps.get_model('events_app', 'Event')
+    Registration = apps.get_model('events_app', 'Registration')
+    alias = schema_editor.connection.alias
+
+    registrations = Registration.objects.using(alias).filter(event=models.OuterRef('pk')).order_by()
+    counts = registrations.values('event').annotate(count=models.Count('id')).values('count')
+    Event.objects.using(alias).update(registration_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0010_event_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='registration_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(deduplicate_registrations, migrations.RunPython.noop),
+        migrations.RunPython(count_registrations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='registration',
+            constraint=models.UniqueConstraint(fields=('user', 'event'), name='unique_event_registration'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:25
+
+import events_app.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0011_event_capacity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='id',
+            field=models.UUIDField(default=events_app.utils.uuid7, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
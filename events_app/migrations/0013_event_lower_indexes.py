@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:34
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0012_event_id_uuid7'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='events_app_event_name_lwr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.db.models.functions.text.Lower('location'), name='events_app_event_loc_lwr_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:40
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def count_facets(apps, schema_editor):
+    Event = apps.get_model('events_app', 'Event')
+    EventFacetCount = apps.get_model('events_app', 'EventFacetCount')
+    alias = schema_editor.connection.alias
+
+    events = Event.objects.using(alias).order_by()
+    counts = []
+    for facet, expression in (('location', models.F('location')), ('organizer', models.F('organizer_id')), ('month', TruncMonth('date'))):
+        for group in events.values(facet_value=expression).annotate(count=models.Count('id')):
+            value = f"{group['facet_value']:%Y-%m}" if facet == 'month' else str(group['facet_value'])
+            counts.append(EventFacetCount(facet=facet, value=value, count=group['count']))
+    EventFacetCount.objects.using(alias).bulk_create(counts, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0014_event_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', '-count'], name='events_app_facet_count_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facet', 'value'), name='unique_event_facet_value')],
+            },
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
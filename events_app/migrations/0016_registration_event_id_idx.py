@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_app', '0015_eventfacetcount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['event', 'id'], name='events_app_reg_event_id_idx'),
+        ),
+    ]
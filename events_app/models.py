@@ -1,11 +1,25 @@
-import uuid
+from . import geo
+from .utils import uuid7
 from accounts.models import User
+from datetime import datetime
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone
 from django.db import models
+from django.db.models.functions import Lower
+
+
+class EventQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() is skipped by bulk_create, so derive starts_at and geohash here as well
+        objs = list(objs)
+        for event in objs:
+            event.starts_at = event.get_starts_at()
+            event.geohash = event.get_geohash()
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Event(models.Model):
-    id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, unique=True, default=uuid7)
     name = models.CharField(max_length=255)
     description = models.TextField()
     location = models.CharField(max_length=255)
@@ -13,13 +27,59 @@ class Event(models.Model):
     time = models.TimeField()
     ticket_price = models.DecimalField(max_digits=14, decimal_places=4, default=0.00)
     organizer = models.ForeignKey(User, on_delete=models.CASCADE)
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    registration_count = models.PositiveIntegerField(default=0, editable=False)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geohash = models.CharField(max_length=geo.PRECISION, null=True, blank=True, editable=False)
+    starts_at = models.DateTimeField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.starts_at = self.get_starts_at()
+        self.geohash = self.get_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # registration_count is only ever changed by atomic UPDATEs, never written back from a stale instance
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'registration_count'
+            ]
+        if update_fields is not None:
+            update_fields = {*update_fields, 'updated_at'}
+            if {'date', 'time'} & update_fields:
+                update_fields.add('starts_at')
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geohash')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def get_starts_at(self):
+        # date and time are wall-clock values in the project's time zone
+        starts_at = datetime.combine(self.date, self.time)
+        return timezone.make_aware(starts_at, timezone.get_default_timezone())
+
+    def get_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geo.encode(self.latitude, self.longitude)
+
     class Meta:
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['starts_at', 'id'], name='events_app_event_starts_idx'),
+            # case-insensitive exact filters, see views.get_filtered_events
+            models.Index(Lower('name'), name='events_app_event_name_lwr_idx'),
+            models.Index(Lower('location'), name='events_app_event_loc_lwr_idx'),
+            # proximity search, see events_app.geo
+            models.Index(fields=['geohash'], name='events_app_event_geohash_idx'),
+        ]
 
 
 class Registration(models.Model):
@@ -28,4 +88,46 @@ class Registration(models.Model):
     date_registered = models.DateField(auto_now_add=True)
 
     def __str__(self):
-        return f'{self.user} has registered for {self.event}'
\ No newline at end of file
+        return f'{self.user} has registered for {self.event}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'event'], name='unique_event_registration'),
+        ]
+        indexes = [
+            # keyset pages of an event's attendees, see views.get_event_attendees_view
+            models.Index(fields=['event', 'id'], name='events_app_reg_event_id_idx'),
+        ]
+
+class EventFacetCount(models.Model):
+    """
+    Number of events per value of each discovery facet, kept up to date by
+    the Event signals so unscoped facet requests never scan the events
+    table. See events_app.facets.
+    """
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.facet}={self.value}: {self.count}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='unique_event_facet_value'),
+        ]
+        indexes = [
+            models.Index(fields=['facet', '-count'], name='events_app_facet_count_idx'),
+        ]
+
+
+class EventSearchDocument(models.Model):
+    """
+    Gives each event a stable integer key in the full-text search index.
+    The index itself is vendor specific and lives outside the ORM, see
+    events_app.search.
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='search_document')
+
+    def __str__(self):
+        return f'Search document for {self.event_id}'
@@ -0,0 +1,204 @@
+import base64, json
+from . import geo
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination:
+    """
+    Opaque-cursor pagination over a unique ordering.
+
+    The cursor encodes the ordering values of the last row on the page, so
+    the next page is a range scan starting right after it instead of an
+    OFFSET, and no COUNT(*) is issued unless the client asks for one.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+        self.page_size = settings.EVENT_PAGE_SIZE
+        self.max_page_size = settings.EVENT_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request):
+        queryset = self.get_ordered_queryset(queryset, request)
+        self.count = queryset.count() if self.wants_count(request) else None
+        return self.set_page(list(self.get_page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request):
+        queryset = self.get_ordered_queryset(queryset, request)
+        self.count = await queryset.acount() if self.wants_count(request) else None
+        return self.set_page([item async for item in self.get_page_queryset(queryset)])
+
+    def get_ordered_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.position = self.decode_cursor(request)
+        return queryset.order_by(*self.ordering)
+
+    def get_page_queryset(self, queryset):
+        if self.position is not None:
+            try:
+                queryset = queryset.filter(self.keyset_filter(self.position))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound('Invalid cursor')
+        # one extra row tells whether there is a next page
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, page):
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        self.next_position = self.get_position(self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def wants_count(self, request):
+        return request.GET.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def keyset_filter(self, position):
+        # (a, b) after (x, y) is: a > x OR (a = x AND b > y), flipped for descending fields
+        condition = None
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**equal, **{f'{name}__{lookup}': value})
+            condition = step if condition is None else condition | step
+            equal[name] = value
+        return condition
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return [item[field.lstrip('-')] for field in self.ordering]
+        return [getattr(item, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        cursor = request.GET.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.next_position)
+        return replace_query_param(remove_query_param(url, self.count_query_param), self.cursor_query_param, cursor)
+
+    def get_paginated_meta(self):
+        meta = {'next':self.get_next_link()}
+        if self.count is not None:
+            meta['count'] = self.count
+        return meta
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Keyset pagination over relevance-ranked search hits. The cursor holds the
+    rank and index document id of the last hit, which the search backend
+    turns into a range condition on the index itself.
+    """
+    ordering = ('search_rank', 'search_id')
+
+    def paginate_search(self, backend, query, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        self.count = backend.count(query) if self.wants_count(request) else None
+
+        try:
+            hits = backend.search(query, limit=self.page_size + 1, after=position)
+        except (ValueError, TypeError):
+            raise NotFound('Invalid cursor')
+
+        self.has_next = len(hits) > self.page_size
+        hits = hits[:self.page_size]
+        self.next_position = [hits[-1].rank, hits[-1].document_id] if self.has_next else None
+
+        rows = {row['id']: row for row in queryset.filter(id__in=[hit.event_id for hit in hits])}
+        self.page = [
+            dict(rows[hit.event_id], search_rank=hit.rank, search_id=hit.document_id)
+            for hit in hits if hit.event_id in rows
+        ]
+        return self.page
+
+
+class DistancePagination(KeysetPagination):
+    """
+    Keyset pagination over events ordered by distance from a point. The
+    cursor holds the distance and id of the last event on the page. Each page
+    searches a ring starting at that distance and doubles its width until the
+    page is filled or the radius is reached, so a page never reads further
+    out than it needs to. Candidates are ranked from their coordinates alone,
+    and only the events on the page are then fetched in full.
+    """
+    ordering = ('distance', 'id')
+    # the first ring is this fraction of the radius wide
+    first_ring = 1 / 16
+
+    def paginate_near(self, latitude, longitude, radius_km, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        after = None
+        if position is not None:
+            try:
+                after = (float(position[0]), str(position[1]))
+            except (TypeError, ValueError):
+                raise NotFound('Invalid cursor')
+
+        self.count = len(self.rank(latitude, longitude, radius_km, queryset)) if self.wants_count(request) else None
+
+        start = after[0] if after is not None else 0.0
+        width = radius_km * self.first_ring
+        while True:
+            outer = min(start + width, radius_km)
+            ranked = self.rank(latitude, longitude, outer, queryset)
+            if after is not None:
+                ranked = [hit for hit in ranked if (hit['distance'], str(hit['id'])) > after]
+            if outer < radius_km:
+                # distances are rounded, so events just outside the ring could tie with the last ones inside it
+                ranked = [hit for hit in ranked if hit['distance'] < round(outer, 3)]
+            if len(ranked) > self.page_size or outer >= radius_km:
+                break
+            width *= 2
+
+        self.has_next = len(ranked) > self.page_size
+        hits = ranked[:self.page_size]
+        self.next_position = self.get_position(hits[-1]) if self.has_next else None
+
+        rows = {row['id']: row for row in queryset.filter(id__in=[hit['id'] for hit in hits])}
+        self.page = [dict(rows[hit['id']], distance=hit['distance']) for hit in hits if hit['id'] in rows]
+        return self.page
+
+    def rank(self, latitude, longitude, radius_km, queryset):
+        box = geo.get_bounding_box(latitude, longitude, radius_km)
+        candidates = queryset.filter(geo.get_near_filter(box, geo.get_cover_cells(box)))
+        return geo.rank_by_distance(
+            candidates.order_by().values('id', 'latitude', 'longitude'), latitude, longitude, radius_km
+        )
@@ -0,0 +1,238 @@
+import re, uuid
+from abc import ABC, abstractmethod
+from .models import EventSearchDocument
+from collections import namedtuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+
+SearchHit = namedtuple('SearchHit', ['event_id', 'rank', 'document_id'])
+
+
+def get_search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+class BaseSearchBackend(ABC):
+    """
+    Full-text index over event name, location and organizer username.
+
+    Each indexed event owns an EventSearchDocument row whose id is its key in
+    the index. Hits are ordered by ascending rank (best match first) and then
+    document id, which is also the keyset used to paginate them. A backend
+    for another database implements the abstract methods below and is
+    selected with EVENT_SEARCH_BACKEND.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def get_documents(self, events):
+        event_ids = [event.pk for event in events]
+        documents = EventSearchDocument.objects.using(self.using)
+        documents.bulk_create([EventSearchDocument(event_id=event_id) for event_id in event_ids], ignore_conflicts=True)
+        return dict(documents.filter(event_id__in=event_ids).values_list('event_id', 'id'))
+
+    def index(self, events):
+        events = list(events)
+        if events:
+            self.write_documents(self.get_documents(events), events)
+
+    @abstractmethod
+    def get_match(self, query):
+        """The backend's match expression for the query's terms, or None when it has none."""
+
+    @abstractmethod
+    def write_documents(self, documents, events):
+        """Writes the events into the index, documents maps each event id to its document id."""
+
+    @abstractmethod
+    def remove(self, document_ids):
+        """Removes the documents from the index."""
+
+    @abstractmethod
+    def rename_organizer(self, organizer):
+        """Rewrites the organizer's username in the documents of their events."""
+
+    @abstractmethod
+    def search(self, query, limit, after=None):
+        """Up to limit SearchHits for the query, best first, after the (rank, document id) keyset if given."""
+
+    @abstractmethod
+    def count(self, query):
+        """The number of events matching the query."""
+
+    @abstractmethod
+    def get_matches_sql(self, match):
+        """SQL and params selecting the ids of the events matching the match expression."""
+
+    def filter(self, query, queryset):
+        """Narrows an Event queryset to the events matching query, as a subquery on the index."""
+        match = self.get_match(query)
+        if match is None:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(*self.get_matches_sql(match)))
+
+    def get_hits(self, rows):
+        return [SearchHit(uuid.UUID(str(event_id)), rank, document_id) for event_id, rank, document_id in rows]
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """Backed by the events_app_event_fts FTS5 table, ranked with bm25()."""
+    table = 'events_app_event_fts'
+
+    def get_match(self, query):
+        terms = get_search_terms(query)
+        return ' '.join(f'"{term}"*' for term in terms) if terms else None
+
+    def write_documents(self, documents, events):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, name, location, organizer) VALUES (%s, %s, %s, %s)',
+                [(documents[event.pk], event.name, event.location, event.organizer.username) for event in events]
+            )
+
+    def remove(self, document_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(document_id,) for document_id in document_ids])
+
+    def rename_organizer(self, organizer):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.table} SET organizer = %s WHERE rowid IN ('
+                'SELECT d.id FROM events_app_eventsearchdocument d '
+                'JOIN events_app_event e ON e.id = d.event_id WHERE e.organizer_id = %s'
+                ') AND organizer != %s',
+                [organizer.username, organizer.pk, organizer.username]
+            )
+
+    def search(self, query, limit, after=None):
+        match = self.get_match(query)
+        if match is None:
+            return []
+
+        sql = (
+            f'SELECT d.event_id, bm25({self.table}) AS rank, {self.table}.rowid FROM {self.table} '
+            f'JOIN events_app_eventsearchdocument d ON d.id = {self.table}.rowid '
+            f'WHERE {self.table} MATCH %s'
+        )
+        params = [match]
+        if after is not None:
+            rank, document_id = float(after[0]), int(after[1])
+            sql += f' AND (bm25({self.table}) > %s OR (bm25({self.table}) = %s AND {self.table}.rowid > %s))'
+            params += [rank, rank, document_id]
+        sql += f' ORDER BY rank, {self.table}.rowid LIMIT %s'
+        params.append(limit)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return self.get_hits(cursor.fetchall())
+
+    def count(self, query):
+        match = self.get_match(query)
+        if match is None:
+            return 0
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table} WHERE {self.table} MATCH %s', [match])
+            return cursor.fetchone()[0]
+
+    def get_matches_sql(self, match):
+        return (
+            f'SELECT d.event_id FROM {self.table} JOIN events_app_eventsearchdocument d ON d.id = {self.table}.rowid '
+            f'WHERE {self.table} MATCH %s', [match]
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Backed by a GIN-indexed tsvector column on events_app_eventsearchdocument."""
+    document = (
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C')"
+    )
+    rank = "(-ts_rank(document, to_tsquery('simple', %s)))::float8"
+
+    def get_match(self, query):
+        terms = get_search_terms(query)
+        return ' & '.join(f"'{term}':*" for term in terms) if terms else None
+
+    def write_documents(self, documents, events):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE events_app_eventsearchdocument SET document = {self.document} WHERE id = %s',
+                [(event.name, event.location, event.organizer.username, documents[event.pk]) for event in events]
+            )
+
+    def remove(self, document_ids):
+        # the document rows themselves are deleted along with their events
+        pass
+
+    def rename_organizer(self, organizer):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE events_app_eventsearchdocument d SET document = "
+                "setweight(to_tsvector('simple', e.name), 'A') || "
+                "setweight(to_tsvector('simple', e.location), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'C') "
+                "FROM events_app_event e WHERE e.id = d.event_id AND e.organizer_id = %s",
+                [organizer.username, organizer.pk]
+            )
+
+    def search(self, query, limit, after=None):
+        match = self.get_match(query)
+        if match is None:
+            return []
+
+        sql = (
+            f'SELECT event_id, rank, id FROM (SELECT event_id, {self.rank} AS rank, id '
+            "FROM events_app_eventsearchdocument WHERE document @@ to_tsquery('simple', %s)) hits"
+        )
+        params = [match, match]
+        if after is not None:
+            rank, document_id = float(after[0]), int(after[1])
+            sql += ' WHERE rank > %s OR (rank = %s AND id > %s)'
+            params += [rank, rank, document_id]
+        sql += ' ORDER BY rank, id LIMIT %s'
+        params.append(limit)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return self.get_hits(cursor.fetchall())
+
+    def count(self, query):
+        match = self.get_match(query)
+        if match is None:
+            return 0
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM events_app_eventsearchdocument WHERE document @@ to_tsquery('simple', %s)",
+                [match]
+            )
+            return cursor.fetchone()[0]
+
+    def get_matches_sql(self, match):
+        return "SELECT event_id FROM events_app_eventsearchdocument WHERE document @@ to_tsquery('simple', %s)", [match]
+
+
+SEARCH_BACKENDS = {
+    'sqlite':SQLiteSearchBackend,
+    'postgresql':PostgresSearchBackend,
+}
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    if settings.EVENT_SEARCH_BACKEND:
+        return import_string(settings.EVENT_SEARCH_BACKEND)(using=using)
+
+    vendor = connections[using].vendor
+    try:
+        return SEARCH_BACKENDS[vendor](using=using)
+    except KeyError:
+        raise ImproperlyConfigured(f'No event search backend for the {vendor} database, set EVENT_SEARCH_BACKEND')
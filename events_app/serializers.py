@@ -1,5 +1,6 @@
 from accounts.serializers import UserInfoSerializer
 from .models import Event, Registration
+from django.db.models import F
 from rest_framework import serializers
 
 
@@ -8,12 +9,69 @@ class EventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        fields = ['id', 'name', 'description', 'location', 'date', 'time', 'ticket_price', 'organizer']
+        fields = ['id', 'name', 'description', 'location', 'latitude', 'longitude', 'date', 'time', 'ticket_price', 'capacity', 'registration_count', 'organizer']
+
+    def validate(self, data):
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError('Provide both latitude and longitude, or neither')
+        return data
 
     def get_organizer(self, obj):
         return obj.organizer.username if obj.organizer else None
 
 
+class EventProjectionSerializer(EventSerializer):
+    """
+    Read-only twin of EventSerializer for list endpoints. It renders the rows
+    returned by `project()` instead of Event instances, so a page of events
+    and their organizers' usernames come back in a single query without
+    instantiating any models, and the JSON output is identical.
+    """
+    organizer = serializers.CharField(source='organizer_username', allow_null=True)
+
+    class Meta(EventSerializer.Meta):
+        pass
+
+    @classmethod
+    def project(cls, queryset):
+        # created_at and starts_at are not rendered but are needed to build pagination cursors
+        fields = [field for field in cls.Meta.fields if field != 'organizer']
+        return queryset.values(*fields, 'created_at', 'starts_at', organizer_username=F('organizer__username'))
+
+
+class EventDistanceSerializer(EventProjectionSerializer):
+    """Projected events returned by /event/near, with their distance from the searched point in km."""
+    distance = serializers.FloatField()
+
+    class Meta(EventProjectionSerializer.Meta):
+        fields = EventProjectionSerializer.Meta.fields + ['distance']
+
+
+class EventAttendeeSerializer(serializers.Serializer):
+    """
+    Renders the rows returned by `project()`, one registration and its user
+    per row, so a page or an export of attendees takes a single joined query
+    instead of a query per registration for its user and event.
+    """
+    id = serializers.IntegerField()
+    user_id = serializers.CharField()
+    username = serializers.CharField()
+    email = serializers.EmailField()
+    first_name = serializers.CharField()
+    middle_name = serializers.CharField()
+    last_name = serializers.CharField()
+    date_registered = serializers.DateField()
+
+    @classmethod
+    def project(cls, queryset):
+        return queryset.values(
+            'id', 'user_id', 'date_registered', username=F('user__username'), email=F('user__email'),
+            first_name=F('user__first_name'), middle_name=F('user__middle_name'), last_name=F('user__last_name'),
+        )
+
+
 class EventRegistrationSerializer(serializers.ModelSerializer):
     event = serializers.SerializerMethodField()
     user = UserInfoSerializer()
@@ -0,0 +1,123 @@
+from . import facets, ical
+from .cache import bump_generation
+from .models import Event, EventSearchDocument, Registration
+from .search import get_search_backend
+from accounts.models import User
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver, Signal
+from django.utils import timezone
+
+
+# bulk_create sends no post_save, so bulk endpoints send these instead
+events_bulk_created = Signal()
+registrations_bulk_created = Signal()
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, using, **kwargs):
+    get_search_backend(using).index([instance])
+
+
+@receiver(events_bulk_created)
+def index_events(sender, events, using, **kwargs):
+    get_search_backend(using).index(events)
+
+
+@receiver(post_delete, sender=EventSearchDocument)
+def unindex_event(sender, instance, using, **kwargs):
+    get_search_backend(using).remove([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def reindex_organizer_events(sender, instance, created, using, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    get_search_backend(using).rename_organizer(instance)
+    transaction.on_commit(bump_generation, using=using)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+@receiver(events_bulk_created)
+@receiver(registrations_bulk_created)
+def invalidate_cached_responses(sender, using, **kwargs):
+    # after commit, so a response rendered meanwhile from the old rows is never cached under the new generation
+    transaction.on_commit(bump_generation, using=using)
+
+
+@receiver(post_delete, sender=Registration)
+def release_seat(sender, instance, using, origin=None, **kwargs):
+    # nothing to update when the registration goes away because its event is being deleted
+    if isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    Event.objects.using(using).filter(id=instance.event_id, registration_count__gt=0).update(
+        registration_count=F('registration_count') - 1, updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=Event)
+def remember_facet_values(sender, instance, using, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and not facets.FACET_FIELDS & set(update_fields)):
+        instance._facet_values = None
+        return
+    saved = Event.objects.using(using).filter(pk=instance.pk).only(*facets.FACET_FIELDS).first()
+    instance._facet_values = facets.get_facet_values(saved) if saved is not None else None
+
+
+@receiver(post_save, sender=Event)
+def count_saved_event(sender, instance, created, using, **kwargs):
+    before = getattr(instance, '_facet_values', None)
+    if created or before is not None:
+        facets.update_counts(facets.get_deltas(before, facets.get_facet_values(instance)), using)
+
+
+@receiver(post_delete, sender=Event)
+def uncount_deleted_event(sender, instance, using, **kwargs):
+    facets.update_counts(facets.get_deltas(before=facets.get_facet_values(instance)), using)
+
+
+@receiver(events_bulk_created)
+def count_created_events(sender, events, using, **kwargs):
+    deltas = Counter()
+    for event in events:
+        deltas.update(facets.get_deltas(after=facets.get_facet_values(event)))
+    facets.update_counts(deltas, using)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def refresh_event_calendars(sender, instance, using, created=False, **kwargs):
+    keys = [ical.version_key('event', instance.pk)]
+    if created or kwargs['signal'] is post_delete:
+        keys.append(ical.version_key('organizer', instance.organizer_id))
+    ical.bump_versions(keys, using)
+
+
+@receiver(events_bulk_created)
+def refresh_organizer_calendars(sender, events, using, **kwargs):
+    ical.bump_versions({ical.version_key('organizer', event.organizer_id) for event in events}, using)
+
+
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def refresh_user_calendar(sender, instance, using, created=False, **kwargs):
+    if created or kwargs['signal'] is post_delete:
+        ical.bump_versions([ical.version_key('user', instance.user_id)], using)
+
+
+@receiver(registrations_bulk_created)
+def refresh_user_calendars(sender, registrations, using, **kwargs):
+    ical.bump_versions({ical.version_key('user', registration.user_id) for registration in registrations}, using)
+
+
+@receiver(post_save, sender=User)
+def refresh_renamed_organizer_calendar(sender, instance, created, using, update_fields=None, **kwargs):
+    # organizer feeds are looked up by username
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    ical.bump_versions([ical.version_key('organizer', instance.pk)], using)
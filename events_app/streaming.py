@@ -0,0 +1,171 @@
+import csv
+from .serializers import EventAttendeeSerializer, EventProjectionSerializer
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from itertools import islice
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+from rest_framework.response import Response
+
+
+def is_stream_requested(request):
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def get_chunks(request, queryset):
+    """
+    The queryset's rows in lists of EVENT_STREAM_CHUNK_SIZE, read with a
+    chunked iterator (a server-side cursor where the database has one).
+    Under ASGI, Django reads a synchronous iterator into memory before
+    sending any of it, so there the chunks come from an async iterator.
+    """
+    size = settings.EVENT_STREAM_CHUNK_SIZE
+    # DRF wraps the HttpRequest
+    if not isinstance(getattr(request, '_request', request), ASGIRequest):
+        rows = queryset.iterator(chunk_size=size)
+        return iter(lambda: list(islice(rows, size)), [])
+
+    async def chunks():
+        chunk = []
+        async for row in queryset.aiterator(chunk_size=size):
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    return chunks()
+
+
+def render_chunks(chunks, render, head=None, tail=None):
+    """Yields head, render(chunk, index) for every chunk and tail, as an async iterator if chunks is one."""
+    if hasattr(chunks, '__aiter__'):
+        async def content():
+            if head:
+                yield head
+            index = 0
+            async for chunk in chunks:
+                yield render(chunk, index)
+                index += 1
+            if tail:
+                yield tail
+        return content()
+
+    def content():
+        if head:
+            yield head
+        for index, chunk in enumerate(chunks):
+            yield render(chunk, index)
+        if tail:
+            yield tail
+    return content()
+
+
+def stream_events(request, queryset, key, message=None, ordering=('-created_at', '-id')):
+    """
+    Streams every event in the queryset inside the usual
+    {'success':..., 'message':..., key:[...]} envelope. Rows are read and
+    rendered one chunk at a time, so memory stays flat however many events
+    match. Full exports are limited to staff.
+    """
+    if not request.user.is_staff:
+        return Response(
+            {
+                'success':False,
+                'message':'Only staff can stream full event collections'
+            }, status=status.HTTP_403_FORBIDDEN
+        )
+
+    # rows are read after the view returns, so bind the database the view would have read from
+    queryset = queryset.using(queryset.db)
+    chunks = get_chunks(request, EventProjectionSerializer.project(queryset).order_by(*ordering))
+    envelope = {'success':True}
+    if message is not None:
+        envelope['message'] = message
+
+    response = StreamingHttpResponse(render_envelope(envelope, key, chunks), content_type='application/json')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def render_envelope(envelope, key, chunks):
+    renderer = JSONRenderer()
+    # one serializer for the whole stream, a serializer per chunk leaves reference cycles holding every chunk's
+    # rows until the next full garbage collection
+    serializer = EventProjectionSerializer()
+
+    def render(chunk, index):
+        # render the chunk as a list and drop its brackets so chunks join into one array
+        events = renderer.render([serializer.to_representation(row) for row in chunk])[1:-1]
+        return events if index == 0 else b',' + events
+
+    head = renderer.render(envelope)[:-1] + b',' + renderer.render(key) + b':['
+    return render_chunks(chunks, render, head=head, tail=b']}')
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv':'text/csv',
+    'ndjson':'application/x-ndjson',
+}
+
+
+def get_export_format(request):
+    export = request.GET.get('export', '').lower()
+    return export if export in EXPORT_CONTENT_TYPES else None
+
+
+def stream_attendees(request, queryset, export, filename):
+    """
+    Streams every registration in the queryset, joined to its user, as a CSV
+    or NDJSON download. Like stream_events it reads and renders one chunk
+    at a time, so memory stays flat however many people registered.
+    """
+    queryset = queryset.using(queryset.db)
+    chunks = get_chunks(request, EventAttendeeSerializer.project(queryset).order_by('id'))
+    render = render_csv if export == 'csv' else render_ndjson
+
+    response = StreamingHttpResponse(render(chunks), content_type=EXPORT_CONTENT_TYPES[export])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class LineBuffer:
+    """A file-like object whose write() hands back the line, so csv.writer can feed a generator."""
+
+    def write(self, line):
+        return line
+
+
+def escape_cell(value):
+    # attendees choose their own names, which spreadsheet apps would run as formulas
+    if isinstance(value, str) and value.startswith(('=', '+', '-', '@', '\t', '\r')):
+        return "'" + value
+    return value
+
+
+def render_csv(chunks):
+    writer = csv.writer(LineBuffer())
+    serializer = EventAttendeeSerializer()
+    fields = list(serializer.fields)
+
+    def render(chunk, index):
+        return ''.join(
+            writer.writerow([escape_cell(attendee[field]) for field in fields])
+            for attendee in map(serializer.to_representation, chunk)
+        )
+
+    return render_chunks(chunks, render, head=writer.writerow(fields))
+
+
+def render_ndjson(chunks):
+    # the encoder JSONRenderer uses, without its per-call overhead on every line
+    encoder = encoders.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    serializer = EventAttendeeSerializer()
+
+    def render(chunk, index):
+        return ''.join(encoder.encode(serializer.to_representation(row)) + '\n' for row in chunk).encode()
+
+    return render_chunks(chunks, render)
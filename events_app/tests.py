@@ -1,3 +1,741 @@
-from django.test import TestCase
+import datetime, io
+from . import facets, geo, ical
+from .cache import get_generation
+from .models import Event, EventFacetCount, Registration
+from .pagination import DistancePagination
+from .search import BaseSearchBackend, SQLiteSearchBackend
+from .signals import events_bulk_created
+from .serializers import EventSerializer, EventProjectionSerializer
+from .views import get_filtered_events
+from accounts.authentication import CachedJWTAuthentication
+from accounts.models import User
+from core.routers import get_pin_key, pin_to_primary, read_from_replica
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, router, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework_simplejwt.tokens import AccessToken
+from unittest import mock, skipUnless
+
+
+def create_user(number, **extra_fields):
+    return User.objects.create(
+        email=f'user{number}@example.com',
+        username=f'user{number}',
+        first_name='Test',
+        last_name='User',
+        date_of_birth=datetime.date(1990, 1, 1),
+        phone_number=f'0{number:09d}',
+        is_verified=True,
+        **extra_fields
+    )
+
+
+def create_event(organizer, number, **extra_fields):
+    fields = {
+        'name':f'Event {number}',
+        'description':'An event',
+        'location':'Accra',
+        'date':datetime.date.today(),
+        'time':datetime.time(18, 30),
+        'ticket_price':'25.50',
+        'organizer':organizer,
+    }
+    fields.update(extra_fields)
+    return Event.objects.create(**fields)
+
+
+class EventProjectionSerializerTests(TestCase):
+    def setUp(self):
+        self.organizers = [create_user(number) for number in range(3)]
+
+    def test_matches_event_serializer_output(self):
+        for number in range(6):
+            create_event(self.organizers[number % 3], number)
+
+        events = Event.objects.all()
+        expected = JSONRenderer().render(EventSerializer(events, many=True).data)
+        projected = EventProjectionSerializer(EventProjectionSerializer.project(events), many=True).data
+
+        self.assertEqual(JSONRenderer().render(projected), expected)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        create_event(self.organizers[0], 0)
+        with self.assertNumQueries(1):
+            self.client.get('/event/all')
+
+        # cached responses are invalidated when the new events commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for number in range(1, 30):
+                create_event(self.organizers[number % 3], number)
+        with self.assertNumQueries(1):
+            response = self.client.get('/event/all')
+
+        self.assertEqual(len(response.json()['event']), 30)
+
+
+class FilterEventsIndexTests(TestCase):
+    def setUp(self):
+        self.organizers = [create_user(number) for number in range(3)]
+        for number in range(12):
+            create_event(
+                self.organizers[number % 3], number, location=['Accra', 'Kumasi', 'Tamale'][number % 3]
+            )
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == 'postgresql':
+            # with a handful of rows the planner would rather scan, which says nothing about the index
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        # the same joins and ordering as the paginated filter endpoint
+        plan = EventProjectionSerializer.project(queryset).order_by('-created_at', '-id').explain()
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'sqlite':
+            self.assertIn('SEARCH', plan)
+
+    def test_name_filter_uses_lower_index(self):
+        self.assertUsesIndex(get_filtered_events(name='EVENT 3'), 'events_app_event_name_lwr_idx')
+
+    def test_location_filter_uses_lower_index(self):
+        self.assertUsesIndex(get_filtered_events(location='kumasi'), 'events_app_event_loc_lwr_idx')
+
+    def test_organizer_filter_uses_lower_index(self):
+        self.assertUsesIndex(get_filtered_events(organizer='USER1'), 'accounts_user_uname_lwr_idx')
+
+    def test_filters_match_case_insensitively(self):
+        response = self.client.get('/event/filter', {'location':'kUMASI', 'organizer':'User1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(event['name'] for event in response.json()['events']),
+            sorted(f'Event {number}' for number in range(1, 12, 3)),
+        )
+        self.assertEqual(self.client.get('/event/filter', {'name':'event 7'}).json()['events'][0]['name'], 'Event 7')
+
+
+class RegistrationCountTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(0)
+        self.event = create_event(self.organizer, 0, capacity=2)
+
+    def register(self, user):
+        return self.client.post(
+            reverse('register_for_event', args=[self.event.id]),
+            headers={'Authorization':f'Bearer {AccessToken.for_user(user)}'},
+        )
+
+    def assertRegistrationCount(self, count):
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, count)
+        self.assertEqual(Registration.objects.filter(event=self.event).count(), count)
+
+    def test_full_event_returns_conflict(self):
+        for number in range(1, 3):
+            self.assertEqual(self.register(create_user(number)).status_code, 201)
+
+        response = self.register(create_user(3))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertRegistrationCount(2)
+
+    def test_second_registration_releases_its_seat(self):
+        user = create_user(1)
+        self.assertEqual(self.register(user).status_code, 201)
+
+        response = self.register(user)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertRegistrationCount(1)
+        self.assertEqual(self.register(create_user(2)).status_code, 201)
+
+    def test_deleting_registration_releases_its_seat(self):
+        user = create_user(1)
+        self.assertEqual(self.register(user).status_code, 201)
+
+        Registration.objects.get(event=self.event, user=user).delete()
+
+        self.assertRegistrationCount(0)
+        for number in range(2, 4):
+            self.assertEqual(self.register(create_user(number)).status_code, 201)
+        self.assertRegistrationCount(2)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = create_user(0)
+        self.attendee = create_user(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event = create_event(self.organizer, 0)
+        self.user_url = reverse('user_calendar', args=[ical.get_user_feed_token(self.attendee.pk)])
+        self.organizer_url = reverse('organizer_calendar', args=[self.organizer.username])
+
+    def register(self, user, event):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Registration.objects.create(user=user, event=event)
+
+    def test_feed_token_is_signed(self):
+        token = ical.get_user_feed_token(self.attendee.pk)
+
+        self.assertEqual(ical.get_user_id(token), self.attendee.pk)
+        self.assertIsNone(ical.get_user_id(token[:-1] + ('a' if token[-1] != 'a' else 'b')))
+        self.assertIsNone(ical.get_user_id(self.attendee.pk))
+        self.assertEqual(self.client.get(reverse('user_calendar', args=[self.attendee.pk])).status_code, 404)
+
+    def test_registration_adds_event_to_feed(self):
+        self.assertEqual(self.client.get(self.user_url).content.count(b'BEGIN:VEVENT'), 0)
+
+        self.register(self.attendee, self.event)
+
+        self.assertIn(f'UID:{self.event.id}'.encode(), self.client.get(self.user_url).content)
+
+    def test_event_edit_refreshes_feed(self):
+        self.register(self.attendee, self.event)
+        etag = self.client.get(self.user_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.name = 'Renamed event'
+            self.event.save()
+        response = self.client.get(self.user_url, headers={'If-None-Match':etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'SUMMARY:Renamed event', response.content)
+
+    def test_organizer_rename_moves_feed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organizer.username = 'renamed'
+            self.organizer.save()
+
+        self.assertEqual(self.client.get(self.organizer_url).status_code, 404)
+        response = self.client.get(reverse('organizer_calendar', args=['renamed']))
+        self.assertIn(f'UID:{self.event.id}'.encode(), response.content)
+        self.assertIn(b'X-WR-CALNAME:Events by renamed', response.content)
+
+    def test_unchanged_feed_answers_not_modified(self):
+        etag = self.client.get(self.organizer_url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.organizer_url, headers={'If-None-Match':etag})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_committed_while_feed_builds_is_not_cached(self):
+        self.register(self.attendee, self.event)
+        get_versions = ical.get_versions
+
+        def edit_then_get_versions(keys):
+            # the edit commits, and replaces its token, after the feed read the event's row
+            if ical.version_key('event', self.event.id) in keys:
+                with self.captureOnCommitCallbacks(execute=True):
+                    Event.objects.filter(id=self.event.id).update(name='Edited', updated_at=timezone.now())
+                    ical.bump_versions([ical.version_key('event', self.event.id)], 'default')
+            return get_versions(keys)
+
+        with mock.patch('events_app.ical.get_versions', side_effect=edit_then_get_versions):
+            self.assertIn(b'SUMMARY:Event 0', self.client.get(self.user_url).content)
+
+        self.assertIn(b'SUMMARY:Edited', self.client.get(self.user_url).content)
+
+    def test_text_is_escaped_and_folded(self):
+        event = {
+            'id':self.event.id,
+            'name':'Jazz, blues; and\\ more\nlate',
+            'description':'ünïcødé ' * 20,
+            'location':'Accra',
+            'latitude':None,
+            'longitude':None,
+            'starts_at':datetime.datetime(2030, 1, 1, 18, 30, tzinfo=datetime.timezone.utc),
+            'updated_at':datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+        }
+
+        vevent = ical.render_vevent(event)
+
+        self.assertIn('SUMMARY:Jazz\\, blues\\; and\\\\ more\\nlate\r\n', vevent)
+        self.assertIn('DTSTART:20300101T183000Z\r\n', vevent)
+        lines = vevent.split('\r\n')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(any(line.startswith(' ') for line in lines))
+        self.assertIn('DESCRIPTION:' + 'ünïcødé ' * 20, vevent.replace('\r\n ', ''))
+
+
+class DistancePaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        organizer = create_user(0)
+        # rings of events around the point, with several at the same spot so distances tie
+        self.points = [(5.6 + 0.01 * (number % 7), -0.19 + 0.02 * (number // 7)) for number in range(40)]
+        self.points += [(5.65, -0.15)] * 5 + [(6.4, 0.5)] * 3
+        for number, (latitude, longitude) in enumerate(self.points):
+            create_event(organizer, number, latitude=latitude, longitude=longitude)
+
+    def walk(self, url):
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [event['name'] for event in response.json()['events']]
+            url = response.json()['next']
+        return names
+
+    def test_pages_return_every_event_once_in_distance_order(self):
+        expected = sorted(
+            (round(geo.distance_km(5.6, -0.19, latitude, longitude), 3), number)
+            for number, (latitude, longitude) in enumerate(self.points)
+            if geo.distance_km(5.6, -0.19, latitude, longitude) <= 150
+        )
+
+        names = self.walk(reverse('events_near') + '?lat=5.6&lng=-0.19&radius=150&page_size=4')
+
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(sorted(names), sorted(f'Event {number}' for distance, number in expected))
+        distances = {f'Event {number}':distance for distance, number in expected}
+        self.assertEqual([distances[name] for name in names], [distance for distance, number in expected])
+
+    def test_first_page_only_searches_the_nearest_ring(self):
+        radii = []
+        rank = DistancePagination.rank
+
+        def record_rank(paginator, latitude, longitude, radius_km, queryset):
+            radii.append(radius_km)
+            return rank(paginator, latitude, longitude, radius_km, queryset)
+
+        with mock.patch.object(DistancePagination, 'rank', record_rank):
+            response = self.client.get(reverse('events_near'), {'lat':5.6, 'lng':-0.19, 'radius':160, 'page_size':3})
+
+        self.assertEqual(len(response.json()['events']), 3)
+        self.assertEqual(radii, [10])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        organizer = create_user(0)
+        for number in range(23):
+            create_event(organizer, number)
+        # most events share a creation time, so only the id tiebreaker orders them
+        Event.objects.exclude(name__in=['Event 0', 'Event 1']).update(created_at=timezone.now())
+
+    def test_pages_return_every_event_once_despite_ties(self):
+        ids = []
+        url = reverse('get_all_events') + '?page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['event']), 4)
+            ids += [event['id'] for event in response.json()['event']]
+            url = response.json()['next']
+
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), {str(pk) for pk in Event.objects.values_list('id', flat=True)})
+
+    def test_invalid_cursor_returns_not_found(self):
+        for cursor in ['zzz', 'bm90IGpzb24', 'WyJ4Il0', 'WyJub3QgYSBkYXRlIiwgIm5vdCBhbiBpZCJd']:
+            response = self.client.get(reverse('get_all_events'), {'cursor':cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_count_is_only_returned_when_asked_for(self):
+        self.assertNotIn('count', self.client.get(reverse('get_all_events')).json())
+
+        response = self.client.get(reverse('get_all_events'), {'count':'1', 'page_size':5})
+
+        self.assertEqual(response.json()['count'], 23)
+        self.assertNotIn('count=', response.json()['next'])
+
+    @override_settings(EVENT_MAX_PAGE_SIZE=5)
+    def test_page_size_is_clamped(self):
+        response = self.client.get(reverse('get_all_events'), {'page_size':1000})
+
+        self.assertEqual(len(response.json()['event']), 5)
+        self.assertIsNotNone(response.json()['next'])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'the FTS5 index is SQLite only')
+class SQLiteSearchIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = create_user(0)
+        self.backend = SQLiteSearchBackend()
+
+    def search(self, query):
+        return [hit.event_id for hit in self.backend.search(query, limit=10)]
+
+    def test_base_backend_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BaseSearchBackend()
+
+    def test_created_event_is_indexed(self):
+        event = create_event(self.organizer, 0, name='Highlife evening', location='Kumasi')
+
+        self.assertEqual(self.search('highlife'), [event.id])
+        self.assertEqual(self.search('kumasi'), [event.id])
+        self.assertEqual(self.search('user0'), [event.id])
+        self.assertEqual(self.backend.count('highlife'), 1)
+
+    def test_updated_event_is_reindexed(self):
+        event = create_event(self.organizer, 0, name='Highlife evening')
+
+        event.name = 'Afrobeats evening'
+        event.save()
+
+        self.assertEqual(self.search('highlife'), [])
+        self.assertEqual(self.search('afrobeats'), [event.id])
+
+    def test_deleted_event_is_removed(self):
+        event = create_event(self.organizer, 0, name='Highlife evening')
+
+        event.delete()
+
+        self.assertEqual(self.search('highlife'), [])
+        self.assertEqual(self.backend.count('highlife'), 0)
+
+    def test_organizer_rename_is_reindexed(self):
+        event = create_event(self.organizer, 0)
+
+        self.organizer.username = 'renamed'
+        self.organizer.save()
+
+        self.assertEqual(self.search('user0'), [])
+        self.assertEqual(self.search('renamed'), [event.id])
+
+    def test_hits_are_ordered_by_bm25(self):
+        sparse = create_event(self.organizer, 0, name='Jazz and a long evening of many other things', location='Tamale')
+        dense = create_event(self.organizer, 1, name='Jazz jazz jazz', location='Tamale')
+        short = create_event(self.organizer, 2, name='Jazz night', location='Tamale')
+        create_event(self.organizer, 3, name='Blues night', location='Tamale')
+
+        hits = self.backend.search('jazz', limit=10)
+
+        self.assertEqual([hit.event_id for hit in hits], [dense.id, short.id, sparse.id])
+        self.assertEqual([hit.rank for hit in hits], sorted(hit.rank for hit in hits))
+        response = self.client.get(reverse('search_events'), {'query':'jazz'})
+        self.assertEqual([event['id'] for event in response.json()['events']], [str(dense.id), str(short.id), str(sparse.id)])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = create_user(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event = create_event(self.organizer, 0)
+
+    def get_names(self):
+        return sorted(event['name'] for event in self.client.get(reverse('get_all_events')).json()['event'])
+
+    def assertBumps(self, change):
+        generation = get_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertGreater(get_generation(), generation)
+
+    def test_writes_bump_generation_and_miss_the_cache(self):
+        self.assertEqual(self.get_names(), ['Event 0'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_names(), ['Event 0'])
+
+        self.assertBumps(lambda: create_event(self.organizer, 1))
+        self.assertEqual(self.get_names(), ['Event 0', 'Event 1'])
+
+        def rename():
+            self.event.name = 'Renamed'
+            self.event.save()
+        self.assertBumps(rename)
+        self.assertEqual(self.get_names(), ['Event 1', 'Renamed'])
+
+        detail = reverse('get_event_details', args=[self.event.id])
+        self.assertEqual(self.client.get(detail).json()['event']['registration_count'], 0)
+        attendee = create_user(1)
+        self.assertBumps(lambda: self.client.post(
+            reverse('register_for_event', args=[self.event.id]),
+            headers={'Authorization':f'Bearer {AccessToken.for_user(attendee)}'},
+        ))
+        self.assertEqual(self.client.get(detail).json()['event']['registration_count'], 1)
+
+        self.assertBumps(self.event.delete)
+        self.assertEqual(self.get_names(), ['Event 1'])
+
+    def test_rolled_back_write_keeps_generation(self):
+        generation = get_generation()
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                create_event(self.organizer, 1)
+                raise ValueError
+
+        self.assertEqual(get_generation(), generation)
+
+    def test_date_relative_lists_are_cached_per_day(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_event(self.organizer, 1, date=today + datetime.timedelta(days=8))
+        url = reverse('events_within_next_7_days')
+
+        self.assertNotIn('Event 1', [event['name'] for event in self.client.get(url).json()['events']])
+
+        tomorrow = today + datetime.timedelta(days=1)
+        with mock.patch('django.utils.timezone.localdate', return_value=tomorrow), \
+                mock.patch('events_app.cache.localdate', return_value=tomorrow):
+            response = self.client.get(url)
+
+        self.assertIn('Event 1', [event['name'] for event in response.json()['events']])
+
+
+def auth_headers(user):
+    return {'Authorization':f'Bearer {AccessToken.for_user(user)}'}
+
+
+class UnknownEventTests(TestCase):
+    def test_event_endpoints_reject_unknown_event(self):
+        user = create_user(0, is_staff=True)
+        event_id = '00000000-0000-0000-0000-000000000000'
+        requests = [
+            ('get', reverse('get_event_details', args=[event_id])),
+            ('patch', reverse('update_event', args=[event_id])),
+            ('delete', reverse('delete_event', args=[event_id])),
+            ('post', reverse('register_for_event', args=[event_id])),
+            ('post', reverse('bulk_register_for_event', args=[event_id])),
+        ]
+
+        for method, url in requests:
+            response = getattr(self.client, method)(url, {'users':[user.pk]}, content_type='application/json', headers=auth_headers(user))
+            self.assertEqual(response.status_code, 400, url)
+            self.assertEqual(response.json()['message'], 'Event does not exist')
+
+
+class BulkEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = create_user(0, is_staff=True)
+        self.event = create_event(self.staff, 0, capacity=3)
+        self.users = [create_user(number) for number in range(1, 5)]
+
+    def bulk_create(self, items):
+        return self.client.post(reverse('bulk_create_events'), items, content_type='application/json', headers=auth_headers(self.staff))
+
+    def bulk_register(self, user_ids):
+        return self.client.post(
+            reverse('bulk_register_for_event', args=[self.event.id]), {'users':user_ids},
+            content_type='application/json', headers=auth_headers(self.staff),
+        )
+
+    def get_item(self, number, **extra_fields):
+        item = {'name':f'Bulk {number}', 'description':'An event', 'location':'Accra', 'date':'2030-01-01', 'time':'18:30'}
+        item.update(extra_fields)
+        return item
+
+    def test_bulk_create_with_an_invalid_item_creates_nothing(self):
+        response = self.bulk_create([self.get_item(1), self.get_item(2, date='not a date'), self.get_item(3)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['success'] for result in response.json()['results']], [True, False, True])
+        self.assertIn('date', response.json()['results'][1]['errors'])
+        self.assertFalse(Event.objects.filter(name__startswith='Bulk').exists())
+
+        response = self.bulk_create([self.get_item(1), self.get_item(2)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Event.objects.filter(name__startswith='Bulk', organizer=self.staff).count(), 2)
+
+    @override_settings(EVENT_BULK_MAX_ITEMS=2)
+    def test_bulk_requests_are_limited(self):
+        self.assertEqual(self.bulk_create([self.get_item(number) for number in range(3)]).status_code, 400)
+        self.assertEqual(self.bulk_create([]).status_code, 400)
+        self.assertEqual(self.bulk_create({'name':'Not a list'}).status_code, 400)
+        self.assertEqual(self.bulk_register([user.pk for user in self.users[:3]]).status_code, 400)
+        self.assertEqual(self.bulk_register([]).status_code, 400)
+        self.assertFalse(Event.objects.filter(name__startswith='Bulk').exists())
+        self.assertFalse(Registration.objects.exists())
+
+    def test_bulk_register_reports_each_user(self):
+        Registration.objects.create(user=self.users[0], event=self.event)
+        Event.objects.filter(id=self.event.id).update(registration_count=1)
+
+        response = self.bulk_register([self.users[0].pk, self.users[1].pk, 'nobody', self.users[1].pk])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [(result['user'], result['success']) for result in response.json()['results']],
+            [(self.users[0].pk, False), (self.users[1].pk, True), ('nobody', False)],
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, 2)
+
+    def test_bulk_register_beyond_capacity_registers_nobody(self):
+        response = self.bulk_register([user.pk for user in self.users])
+
+        self.assertEqual(response.status_code, 409)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, 0)
+        self.assertFalse(Registration.objects.exists())
+
+        self.assertEqual(self.bulk_register([user.pk for user in self.users[:3]]).status_code, 201)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, 3)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = create_user(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event = create_event(self.organizer, 0)
+        self.detail_url = reverse('get_event_details', args=[self.event.id])
+
+    def test_matching_etag_returns_not_modified(self):
+        for url in [self.detail_url, reverse('get_all_events')]:
+            etag = self.client.get(url)['ETag']
+
+            response = self.client.get(url, headers={'If-None-Match':etag})
+
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_unmodified_since_returns_not_modified(self):
+        for url in [self.detail_url, reverse('get_all_events')]:
+            last_modified = self.client.get(url)['Last-Modified']
+
+            self.assertEqual(self.client.get(url, headers={'If-Modified-Since':last_modified}).status_code, 304, url)
+
+    def test_edit_returns_new_etag(self):
+        for url in [self.detail_url, reverse('get_all_events')]:
+            etag = self.client.get(url)['ETag']
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.event.name = f'Renamed for {url}'
+                self.event.save()
+            response = self.client.get(url, headers={'If-None-Match':etag})
+
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertIn(f'Renamed for {url}', response.content.decode())
+
+
+@read_from_replica
+@api_view(['GET', 'POST'])
+def routed_view(request):
+    return Response({
+        'user':request.user.pk,
+        'read':router.db_for_read(Event),
+        'write':router.db_for_write(Event),
+    })
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('core.routers.get_replicas', return_value=['replica_1', 'replica_2'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = create_user(0, is_staff=True)
+        self.factory = RequestFactory()
+
+    def route(self, method='get', user=None):
+        return routed_view(getattr(self.factory, method)('/', headers=auth_headers(user) if user else {})).data
+
+    def test_reads_go_to_a_replica_and_writes_to_the_primary(self):
+        routed = self.route()
+
+        self.assertIn(routed['read'], ['replica_1', 'replica_2'])
+        self.assertEqual(routed['write'], 'default')
+        self.assertEqual(self.route('post')['read'], 'default')
+        self.assertEqual(router.db_for_read(Event), 'default')
+
+    def test_pinned_user_reads_from_the_primary(self):
+        other = create_user(1)
+        pin_to_primary(self.user)
+
+        self.assertEqual(self.route(user=self.user)['read'], 'default')
+        self.assertIn(self.route(user=other)['read'], ['replica_1', 'replica_2'])
+
+    def test_token_is_validated_once(self):
+        validate = CachedJWTAuthentication.get_validated_token
+        with mock.patch.object(CachedJWTAuthentication, 'get_validated_token', autospec=True, side_effect=validate) as validated:
+            routed = self.route(user=self.user)
+
+        self.assertEqual(routed['user'], self.user.pk)
+        self.assertEqual(validated.call_count, 1)
+
+    def test_writes_pin_the_user(self):
+        event = create_event(self.user, 0)
+        requests = [
+            ('post', reverse('bulk_create_events'), [{'name':'Bulk', 'description':'An event', 'location':'Accra', 'date':'2030-01-01', 'time':'18:30'}]),
+            ('post', reverse('bulk_register_for_event', args=[event.id]), {'users':[create_user(1).pk]}),
+            ('delete', reverse('delete_event', args=[event.id]), None),
+        ]
+
+        for method, url, data in requests:
+            cache.delete(get_pin_key(self.user.pk))
+            response = getattr(self.client, method)(url, data, content_type='application/json', headers=auth_headers(self.user))
+            self.assertLess(response.status_code, 300, url)
+            self.assertTrue(cache.get(get_pin_key(self.user.pk)), url)
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        self.organizers = [create_user(number) for number in range(2)]
+
+    def assertCountsMatchRebuild(self):
+        rows = EventFacetCount.objects.filter(count__gt=0).values_list('facet', 'value', 'count')
+        stored = {(facet, value):count for facet, value, count in rows}
+        total, counts = facets.count_facets(Event.objects.all(), list(facets.FACETS))
+        actual = {(facet, value):count for facet, values in counts.items() for value, count in values}
+        self.assertEqual(stored, actual)
+        self.assertFalse(EventFacetCount.objects.filter(count__lt=0).exists())
+
+        out = io.StringIO()
+        call_command('rebuild_event_facets', '--dry-run', stdout=out)
+        self.assertIn('found 0 drifted', out.getvalue())
+
+    def test_created_events_are_counted(self):
+        for number in range(4):
+            create_event(self.organizers[number % 2], number, location=['Accra', 'Kumasi'][number % 2])
+
+        self.assertCountsMatchRebuild()
+        self.assertEqual(EventFacetCount.objects.get(facet='location', value='Kumasi').count, 2)
+
+    def test_edited_events_move_between_values(self):
+        event = create_event(self.organizers[0], 0)
+        create_event(self.organizers[0], 1)
+
+        event.location = 'Tamale'
+        event.save()
+        self.assertCountsMatchRebuild()
+
+        event.organizer = self.organizers[1]
+        event.save(update_fields=['organizer'])
+        self.assertCountsMatchRebuild()
+
+        event.date = event.date + datetime.timedelta(days=40)
+        event.save()
+        self.assertCountsMatchRebuild()
+
+        # a change to other fields leaves the counts alone
+        event.name = 'Renamed'
+        event.save(update_fields=['name'])
+        self.assertCountsMatchRebuild()
+
+    def test_deleted_events_are_uncounted(self):
+        events = [create_event(self.organizers[0], number) for number in range(3)]
+
+        events[0].delete()
+        Event.objects.filter(id=events[1].id).delete()
+
+        self.assertCountsMatchRebuild()
+        self.assertEqual(EventFacetCount.objects.get(facet='location', value='Accra').count, 1)
+
+    def test_bulk_created_events_are_counted(self):
+        events = Event.objects.bulk_create([
+            Event(
+                name=f'Bulk {number}', description='An event', location=['Accra', 'Ho'][number % 2],
+                date=datetime.date(2030, 1 + number % 3, 1), time=datetime.time(18, 30), organizer=self.organizers[number % 2],
+            )
+            for number in range(6)
+        ])
+        events_bulk_created.send(sender=Event, events=events, using='default')
+
+        self.assertCountsMatchRebuild()
+        self.assertEqual(EventFacetCount.objects.get(facet='month', value='2030-02').count, 2)
 
-# Create your tests here.
@@ -1,15 +1,28 @@
-from . import views
+from . import async_views, views
+from django.conf import settings
 from django.urls import path
 
+# read-only endpoints are served by native async views under ASGI, see core/asgi.py
+read_views = async_views if settings.EVENT_ASYNC_READ_VIEWS else views
+
 urlpatterns = [
-    path('search', views.search_events_view, name='search_events'),
-    path('filter', views.filter_events_view, name='filter_events'),
+    path('search', read_views.search_events_view, name='search_events'),
+    path('near', read_views.events_near_view, name='events_near'),
+    path('facets', read_views.event_facets_view, name='event_facets'),
+    path('filter', read_views.filter_events_view, name='filter_events'),
     path('create', views.create_event_view, name='create_event'),
-    path('<uuid:event_id>', views.get_event_details_view, name='get_event_details'),
+    path('bulk', views.bulk_create_events_view, name='bulk_create_events'),
+    path('<uuid:event_id>', read_views.get_event_details_view, name='get_event_details'),
     path('<uuid:event_id>/register', views.register_for_event_view, name='register_for_event'),
+    path('<uuid:event_id>/register/bulk', views.bulk_register_for_event_view, name='bulk_register_for_event'),
+    path('<uuid:event_id>/attendees', views.get_event_attendees_view, name='event_attendees'),
     path('<uuid:event_id>/update', views.update_event_details_view, name='update_event'),
     path('<uuid:event_id>/delete', views.delete_event_view, name='delete_event'),
-    path('all', views.get_all_events_view, name='get_all_events'),
-    path('next-7-days', views.events_within_next_7_days_view, name='events_within_next_7_days'),
-    path('next-month', views.events_within_next_month_view, name='events_within_next_month'),
+    path('calendar', views.calendar_feeds_view, name='calendar_feeds'),
+    path('calendar/user/<str:token>.ics', views.user_calendar_view, name='user_calendar'),
+    path('calendar/organizer/<str:username>.ics', views.organizer_calendar_view, name='organizer_calendar'),
+    path('all', read_views.get_all_events_view, name='get_all_events'),
+    path('next-7-days', read_views.events_within_next_7_days_view, name='events_within_next_7_days'),
+    path('next-month', read_views.events_within_next_month_view, name='events_within_next_month'),
+    path('window', read_views.events_within_window_view, name='events_within_window'),
 ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os, threading, time, uuid
+
+
+_lock = threading.Lock()
+_last_timestamp = -1
+_counter = 0
+
+
+def uuid7():
+    """
+    A UUIDv7 (RFC 9562): a 48-bit Unix timestamp in milliseconds, then a
+    12-bit counter and 62 random bits. IDs from one process are strictly
+    increasing, so new rows land at the end of the primary key index and
+    ID order follows creation order.
+    """
+    global _last_timestamp, _counter
+    with _lock:
+        timestamp = max(time.time_ns() // 1_000_000, _last_timestamp)
+        if timestamp == _last_timestamp:
+            _counter += 1
+            if _counter > 0xfff:
+                # the counter is used up, borrow the next millisecond
+                timestamp += 1
+                _counter = int.from_bytes(os.urandom(2), 'big') & 0x7ff
+        else:
+            # start low in the counter range so there is room to increment
+            _counter = int.from_bytes(os.urandom(2), 'big') & 0x7ff
+        _last_timestamp = timestamp
+        counter = _counter
+
+    random_bits = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    number = timestamp << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random_bits
+    return uuid.UUID(int=number)
+
@@ -1,14 +1,30 @@
+from . import facets, ical
+from .cache import cache_response, event_etag, event_last_modified, get_facet_window_start, get_today, get_window_start, list_etag, list_last_modified
 from .models import Event, Registration
-from .serializers import EventSerializer, EventRegistrationSerializer
+from .pagination import DistancePagination, KeysetPagination, SearchPagination
+from .search import get_search_backend
+from .signals import events_bulk_created, registrations_bulk_created
+from .streaming import get_export_format, is_stream_requested, stream_attendees, stream_events
+from .serializers import EventSerializer, EventAttendeeSerializer, EventDistanceSerializer, EventProjectionSerializer, EventRegistrationSerializer
+from accounts.models import User
 from accounts.permissions import IsVerified
-from datetime import timedelta
-from django.db.models import Q
+from core.routers import pin_to_primary, read_from_replica
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Lower
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import condition, require_safe
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from zoneinfo import ZoneInfo
 
 
 def get_event(event_id):
@@ -24,14 +40,118 @@ def get_event(event_id):
         )
 
 
-def get_timeframe(days):
-    now = timezone.now()
-    time_frame = now + timedelta(days=days)
-    events = Event.objects.filter(date__gte=now.date(), date__lte=time_frame.date())
+def get_item_errors(serializer):
+    # older DRF versions list every item's errors, newer ones map only the invalid indexes
+    errors = serializer.errors
+    if isinstance(errors, dict):
+        return [errors.get(index, {}) for index in range(len(serializer.initial_data))]
+    return list(errors)
+
+
+def get_window(start, end=None, events=None):
+    events = (Event.objects.all() if events is None else events).filter(starts_at__gte=start)
+    if end is not None:
+        events = events.filter(starts_at__lt=end)
+
+    return events
+
 
+def get_timeframe(days):
+    today = datetime.combine(timezone.localdate(), time.min)
+    start = timezone.make_aware(today)
+
+    return get_window(start, start + timedelta(days=days + 1))
+
+
+def get_filtered_events(name=None, location=None, organizer=None, events=None):
+    # LOWER(column) = LOWER(value) is what the lower-cased indexes on these columns can serve, unlike iexact
+    events = Event.objects.all() if events is None else events
+    if name:
+        events = events.alias(name_lower=Lower('name')).filter(name_lower=Lower(Value(name)))
+    if location:
+        events = events.alias(location_lower=Lower('location')).filter(location_lower=Lower(Value(location)))
+    if organizer:
+        events = events.alias(organizer_lower=Lower('organizer__username')).filter(
+            organizer_lower=Lower(Value(organizer))
+        )
     return events
 
 
+def get_calendar_feed(request, token=None, username=None):
+    if not hasattr(request, '_calendar_feed'):
+        if token is not None:
+            user_id = ical.get_user_id(token)
+            request._calendar_feed = ical.get_user_feed(user_id) if user_id is not None else None
+        else:
+            request._calendar_feed = ical.get_organizer_feed(username)
+    return request._calendar_feed
+
+
+def calendar_etag(request, token=None, username=None):
+    feed = get_calendar_feed(request, token, username)
+    return feed['etag'] if feed is not None else None
+
+
+def calendar_response(feed, private):
+    response = HttpResponse(feed['body'], content_type='text/calendar; charset=utf-8')
+    response['Cache-Control'] = f"{'private' if private else 'public'}, max-age={settings.EVENT_CALENDAR_MAX_AGE}"
+    return response
+
+
+def parse_facet_names(value):
+    names = list(dict.fromkeys(value.split(','))) if value else list(facets.FACETS)
+    return names if set(names) <= set(facets.FACETS) else None
+
+
+def get_event_facets(names, params):
+    """
+    Counts for the named facets over the events matching the search, filter
+    and window parameters, read from the maintained counts when there are none.
+    """
+    events = Event.objects.all()
+    scoped = False
+    if params.get('query'):
+        events = get_search_backend(router.db_for_read(Event)).filter(params['query'], events)
+        scoped = True
+    if params.get('name') or params.get('location') or params.get('organizer'):
+        events = get_filtered_events(params.get('name'), params.get('location'), params.get('organizer'), events)
+        scoped = True
+    if params.get('from') or params.get('to'):
+        tz = ZoneInfo(params['tz']) if params.get('tz') else timezone.get_default_timezone()
+        start = parse_window_bound(params['from'], tz) if params.get('from') else timezone.now()
+        end = parse_window_bound(params['to'], tz, end=True) if params.get('to') else None
+        events = get_window(start, end, events)
+        scoped = True
+
+    limit = settings.EVENT_FACET_LIMIT
+    total, counts = facets.count_facets(events, names) if scoped else facets.read_facet_counts(names, limit)
+    return total, facets.render_facets(counts, limit)
+
+
+def parse_near_query(params):
+    latitude = float(params['lat'])
+    longitude = float(params['lng'])
+    radius = float(params.get('radius') or settings.EVENT_NEAR_DEFAULT_RADIUS_KM)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < radius <= settings.EVENT_NEAR_MAX_RADIUS_KM):
+        raise ValueError(params)
+    return latitude, longitude, radius
+
+
+def parse_window_bound(value, tz, end=False):
+    day = parse_date(value)
+    if day is not None:
+        # a bare date covers the whole day, so an end date stops at the next midnight
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, tz)
+    return moment
+
+
 @api_view(['POST'])
 @permission_classes([IsVerified])
 def create_event_view(request):
@@ -41,6 +161,7 @@ def create_event_view(request):
 
         if serializer.is_valid():
             serializer.save(organizer=user)
+            pin_to_primary(user)
 
             return Response(
                 {
@@ -56,10 +177,62 @@ def create_event_view(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsVerified])
+def bulk_create_events_view(request):
+    if request.method == 'POST':
+        user = request.user
+
+        if not isinstance(request.data, list) or not 0 < len(request.data) <= settings.EVENT_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    'success':False,
+                    'message':f'Please provide a list of between 1 and {settings.EVENT_BULK_MAX_ITEMS} events'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = EventSerializer(data=request.data, many=True)
+
+        if not serializer.is_valid():
+            return Response(
+                {
+                    'success':False,
+                    'message':'No events were created, please fix the errors below and resubmit',
+                    'results':[
+                        {'index':index, 'success':not errors, **({'errors':errors} if errors else {})}
+                        for index, errors in enumerate(get_item_errors(serializer))
+                    ]
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            events = Event.objects.bulk_create(
+                [Event(organizer=user, **item) for item in serializer.validated_data], batch_size=500
+            )
+            events_bulk_created.send(sender=Event, events=events, using=router.db_for_write(Event))
+        pin_to_primary(user)
+
+        return Response(
+            {
+                'success':True,
+                'message':f'{len(events)} events have been successfully created',
+                'results':[
+                    {'index':index, 'success':True, 'event':data}
+                    for index, data in enumerate(EventSerializer(events, many=True).data)
+                ]
+            }, status=status.HTTP_201_CREATED
+        )
+
+
+@read_from_replica
+@condition(etag_func=event_etag, last_modified_func=event_last_modified)
 @api_view(['GET'])
+@cache_response()
 def get_event_details_view(request, event_id):
     if request.method == 'GET':
         event = get_event(event_id=event_id)
+        if isinstance(event, Response):
+            return event
 
         serializer = EventSerializer(event)
 
@@ -70,17 +243,25 @@ def get_event_details_view(request, event_id):
             }, status=status.HTTP_200_OK
         )
 
+@read_from_replica
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
 @api_view(['GET'])
+@cache_response()
 def get_all_events_view(request):
     if request.method == 'GET':
-        events = Event.objects.all()
+        if is_stream_requested(request):
+            return stream_events(request, Event.objects.all(), 'event')
+
+        paginator = KeysetPagination()
+        events = paginator.paginate_queryset(EventProjectionSerializer.project(Event.objects.all()), request)
 
-        serializer = EventSerializer(events, many=True)
+        serializer = EventProjectionSerializer(events, many=True)
 
         return Response(
             {
                 'success':True,
-                'event':serializer.data
+                'event':serializer.data,
+                **paginator.get_paginated_meta()
             }, status=status.HTTP_200_OK
         )
 
@@ -91,6 +272,8 @@ def update_event_details_view(request, event_id):
     if request.method == 'PUT' or request.method == 'PATCH':
         user = request.user
         event = get_event(event_id=event_id)
+        if isinstance(event, Response):
+            return event
 
         if user != event.organizer and user.is_staff == False:
             return Response(
@@ -104,6 +287,7 @@ def update_event_details_view(request, event_id):
 
         if serializer.is_valid():
             serializer.save()
+            pin_to_primary(user)
 
             return Response(
                 {
@@ -127,6 +311,8 @@ def delete_event_view(request, event_id):
     if request.method == 'DELETE':
         user = request.user
         event = get_event(event_id=event_id)
+        if isinstance(event, Response):
+            return event
 
         if user != event.organizer and user.is_staff == False:
             return Response(
@@ -137,6 +323,8 @@ def delete_event_view(request, event_id):
             )
 
         event.delete()
+        pin_to_primary(user)
+
         return Response(
             {
                 'success':True,
@@ -145,6 +333,7 @@ def delete_event_view(request, event_id):
         )
 
 
+@read_from_replica
 @api_view(['GET'])
 def search_events_view(request): # search events by name, location or organizer
     if request.method == 'GET':
@@ -158,28 +347,92 @@ def search_events_view(request): # search events by name, location or organizer
                 }, status=status.HTTP_400_BAD_REQUEST
             )
 
-        events = Event.objects.filter(
-            Q(name__icontains=query) |
-            Q(location__icontains=query) |
-            Q(organizer__username__icontains=query)
-        )
+        paginator = SearchPagination()
+        queryset = EventProjectionSerializer.project(Event.objects.all())
+        events = paginator.paginate_search(get_search_backend(router.db_for_read(Event)), query, queryset, request)
 
-        serializer = EventSerializer(events, many=True)
+        serializer = EventProjectionSerializer(events, many=True)
 
         return Response(
             {
                 'success':True,
                 'message':'Here are your search results',
-                'events':serializer.data
+                'events':serializer.data,
+                **paginator.get_paginated_meta()
             }, status=status.HTTP_200_OK
         )
 
 
+@read_from_replica
 @api_view(['GET'])
-def filter_events_view(request): # filters events by name, location or event admin 
+@cache_response()
+def events_near_view(request): # events within ?radius km of ?lat and ?lng, nearest first
     if request.method == 'GET':
-        events = Event.objects.all()
+        try:
+            latitude, longitude, radius = parse_near_query(request.query_params)
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    'success':False,
+                    'message':f'Please provide lat and lng in degrees and a radius of up to {settings.EVENT_NEAR_MAX_RADIUS_KM} km'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = DistancePagination()
+        queryset = EventProjectionSerializer.project(Event.objects.all())
+        events = paginator.paginate_near(latitude, longitude, radius, queryset, request)
 
+        serializer = EventDistanceSerializer(events, many=True)
+
+        return Response(
+            {
+                'success':True,
+                'message':'Here are the events near you',
+                'events':serializer.data,
+                **paginator.get_paginated_meta()
+            }, status=status.HTTP_200_OK
+        )
+
+
+@read_from_replica
+@api_view(['GET'])
+@cache_response(vary=get_facet_window_start)
+def event_facets_view(request): # counts per location, organizer and month for the search, filter and window params
+    if request.method == 'GET':
+        names = parse_facet_names(request.query_params.get('facets'))
+
+        if names is None:
+            return Response(
+                {
+                    'success':False,
+                    'message':f"Please choose facets from {', '.join(facets.FACETS)}"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            total, counts = get_event_facets(names, request.query_params)
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    'success':False,
+                    'message':'Please provide ISO 8601 dates or datetimes and a valid time zone'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                'success':True,
+                'message':'Here are the event counts',
+                'count':total,
+                'facets':counts
+            }, status=status.HTTP_200_OK
+        )
+
+
+@read_from_replica
+@api_view(['GET'])
+def filter_events_view(request): # filters events by name, location or event admin 
+    if request.method == 'GET':
         name = request.query_params.get('name')
         location = request.query_params.get('location')
         organizer = request.query_params.get('organizer')
@@ -192,52 +445,207 @@ def filter_events_view(request): # filters events by name, location or event adm
                 }, status=status.HTTP_400_BAD_REQUEST
             )
 
-        if name:
-            events = events.filter(name__iexact=name)
-        if location:
-            events = events.filter(location__iexact=location)
-        if organizer:
-            events = events.filter(organizer__username__iexact=organizer)
+        events = get_filtered_events(name, location, organizer)
 
-        serializer = EventSerializer(events, many=True)
+        if is_stream_requested(request):
+            return stream_events(request, events, 'events', message='Here are the events after filtering')
+
+        paginator = KeysetPagination()
+        events = paginator.paginate_queryset(EventProjectionSerializer.project(events), request)
+
+        serializer = EventProjectionSerializer(events, many=True)
 
         return Response(
             {
                 'success':True,
                 'message':'Here are the events after filtering',
-                'events':serializer.data
+                'events':serializer.data,
+                **paginator.get_paginated_meta()
             }, status=status.HTTP_200_OK
         )
 
 
+@read_from_replica
 @api_view(['GET'])
+@cache_response(vary=get_today)
 def events_within_next_7_days_view(request):
     if request.method == 'GET':
-        events = get_timeframe(days=7)
+        if is_stream_requested(request):
+            message = 'Results for events within the next week'
+            return stream_events(request, get_timeframe(days=7), 'events', message=message, ordering=('starts_at', 'id'))
+
+        paginator = KeysetPagination(ordering=('starts_at', 'id'))
+        events = paginator.paginate_queryset(EventProjectionSerializer.project(get_timeframe(days=7)), request)
 
-        serializer = EventSerializer(events, many=True)
+        serializer = EventProjectionSerializer(events, many=True)
 
         return Response(
             {
                 'success':True,
                 'message':'Results for events within the next week',
-                'events':serializer.data
+                'events':serializer.data,
+                **paginator.get_paginated_meta()
             }, status=status.HTTP_200_OK
         )
 
 
+@read_from_replica
 @api_view(['GET'])
+@cache_response(vary=get_today)
 def events_within_next_month_view(request):
     if request.method == 'GET':
-        events = get_timeframe(days=30)
+        if is_stream_requested(request):
+            message = 'Results for events within the next week'
+            return stream_events(request, get_timeframe(days=30), 'events', message=message, ordering=('starts_at', 'id'))
 
-        serializer = EventSerializer(events, many=True)
+        paginator = KeysetPagination(ordering=('starts_at', 'id'))
+        events = paginator.paginate_queryset(EventProjectionSerializer.project(get_timeframe(days=30)), request)
+
+        serializer = EventProjectionSerializer(events, many=True)
 
         return Response(
             {
                 'success':True,
                 'message':'Results for events within the next week',
-                'events':serializer.data
+                'events':serializer.data,
+                **paginator.get_paginated_meta()
+            }, status=status.HTTP_200_OK
+        )
+
+
+@read_from_replica
+@api_view(['GET'])
+@cache_response(vary=get_window_start)
+def events_within_window_view(request): # events starting between ?from and ?to, read in ?tz
+    if request.method == 'GET':
+        start = request.query_params.get('from')
+        end = request.query_params.get('to')
+        tz = request.query_params.get('tz')
+
+        try:
+            tz = ZoneInfo(tz) if tz else timezone.get_default_timezone()
+            start = parse_window_bound(start, tz) if start else timezone.now()
+            end = parse_window_bound(end, tz, end=True) if end else None
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    'success':False,
+                    'message':'Please provide ISO 8601 dates or datetimes and a valid time zone'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if end is not None and end <= start:
+            return Response(
+                {
+                    'success':False,
+                    'message':'The end of the window must be after its start'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if is_stream_requested(request):
+            message = 'Results for events within the requested window'
+            return stream_events(request, get_window(start, end), 'events', message=message, ordering=('starts_at', 'id'))
+
+        paginator = KeysetPagination(ordering=('starts_at', 'id'))
+        events = paginator.paginate_queryset(EventProjectionSerializer.project(get_window(start, end)), request)
+
+        serializer = EventProjectionSerializer(events, many=True)
+
+        return Response(
+            {
+                'success':True,
+                'message':'Results for events within the requested window',
+                'events':serializer.data,
+                **paginator.get_paginated_meta()
+            }, status=status.HTTP_200_OK
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsVerified])
+def calendar_feeds_view(request): # subscription links for the caller's calendar feeds
+    if request.method == 'GET':
+        user = request.user
+
+        return Response(
+            {
+                'success':True,
+                'message':'Subscribe to these links in your calendar app',
+                'feeds':{
+                    'registered':request.build_absolute_uri(
+                        reverse('user_calendar', args=[ical.get_user_feed_token(user.pk)])
+                    ),
+                    'organized':request.build_absolute_uri(reverse('organizer_calendar', args=[user.username])),
+                }
+            }, status=status.HTTP_200_OK
+        )
+
+
+@read_from_replica
+@require_safe
+@condition(etag_func=calendar_etag)
+def user_calendar_view(request, token): # events the token's user registered for, as iCalendar
+    feed = get_calendar_feed(request, token=token)
+
+    if feed is None:
+        raise Http404('Calendar feed does not exist')
+
+    return calendar_response(feed, private=True)
+
+
+@read_from_replica
+@require_safe
+@condition(etag_func=calendar_etag)
+def organizer_calendar_view(request, username): # events run by the organizer, as iCalendar
+    feed = get_calendar_feed(request, username=username)
+
+    if feed is None:
+        raise Http404('Calendar feed does not exist')
+
+    return calendar_response(feed, private=False)
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([IsVerified])
+def get_event_attendees_view(request, event_id): # registrations for the event, ?export=csv|ndjson for a download
+    if request.method == 'GET':
+        user = request.user
+        organizer_id = Event.objects.filter(id=event_id).values_list('organizer_id', flat=True).first()
+
+        if organizer_id is None:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Event does not exist'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if user.pk != organizer_id and user.is_staff == False:
+            return Response(
+                {
+                    'success':False,
+                    'message':'You do not have the permission to perform this action. Only event admins can view attendees'
+                }, status=status.HTTP_403_FORBIDDEN
+            )
+
+        registrations = Registration.objects.filter(event_id=event_id)
+        export = get_export_format(request)
+
+        if export is not None:
+            return stream_attendees(request, registrations, export, filename=f'attendees-{event_id}')
+
+        paginator = KeysetPagination(ordering=('id',))
+        attendees = paginator.paginate_queryset(EventAttendeeSerializer.project(registrations), request)
+
+        serializer = EventAttendeeSerializer(attendees, many=True)
+
+        return Response(
+            {
+                'success':True,
+                'message':'Here are the attendees of this event',
+                'attendees':serializer.data,
+                **paginator.get_paginated_meta()
             }, status=status.HTTP_200_OK
         )
 
@@ -249,9 +657,34 @@ def register_for_event_view(request, event_id):
         now = timezone.now()
         user = request.user
         event = get_event(event_id=event_id)
+        if isinstance(event, Response):
+            return event
+
+        # claim a seat with a single conditional UPDATE so concurrent requests can never oversell
+        try:
+            with transaction.atomic():
+                seats_left = Q(capacity__isnull=True) | Q(registration_count__lt=F('capacity'))
+                claimed = Event.objects.filter(seats_left, id=event.id).update(
+                    registration_count=F('registration_count') + 1, updated_at=timezone.now()
+                )
+                if not claimed:
+                    return Response(
+                        {
+                            'success':False,
+                            'message':f"'{event.name}' is fully booked"
+                        }, status=status.HTTP_409_CONFLICT
+                    )
+
+                registration = Registration.objects.create(user=user, event=event)
+        except IntegrityError:
+            return Response(
+                {
+                    'success':False,
+                    'message':f"You have already registered for '{event.name}'"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        registration = Registration.objects.create(user=user, event=event)
-
+        pin_to_primary(user)
         serializer = EventRegistrationSerializer(registration)
 
         return Response(
@@ -261,3 +694,76 @@ def register_for_event_view(request, event_id):
                 'details':serializer.data
             }, status=status.HTTP_201_CREATED
         )
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_register_for_event_view(request, event_id):
+    if request.method == 'POST':
+        event = get_event(event_id=event_id)
+        if isinstance(event, Response):
+            return event
+
+        user_ids = request.data.get('users') if isinstance(request.data, dict) else None
+
+        if not isinstance(user_ids, list) or not 0 < len(user_ids) <= settings.EVENT_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    'success':False,
+                    'message':f'Please provide a list of between 1 and {settings.EVENT_BULK_MAX_ITEMS} user ids as users'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        existing_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        registered = set(
+            Registration.objects.filter(event=event, user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        new_user_ids = [user_id for user_id in user_ids if user_id in existing_users and user_id not in registered]
+
+        try:
+            with transaction.atomic():
+                seats_left = Q(capacity__isnull=True) | Q(registration_count__lte=F('capacity') - len(new_user_ids))
+                claimed = not new_user_ids or Event.objects.filter(seats_left, id=event.id).update(
+                    registration_count=F('registration_count') + len(new_user_ids), updated_at=timezone.now()
+                )
+                if not claimed:
+                    return Response(
+                        {
+                            'success':False,
+                            'message':f"'{event.name}' does not have {len(new_user_ids)} seats left"
+                        }, status=status.HTTP_409_CONFLICT
+                    )
+
+                registrations = Registration.objects.bulk_create(
+                    [Registration(user_id=user_id, event=event) for user_id in new_user_ids], batch_size=500
+                )
+                registrations_bulk_created.send(
+                    sender=Registration, registrations=registrations, using=router.db_for_write(Registration)
+                )
+        except IntegrityError:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Registrations for this event changed while processing, please retry'
+                }, status=status.HTTP_409_CONFLICT
+            )
+
+        pin_to_primary(request.user)
+
+        results = []
+        for user_id in user_ids:
+            if user_id not in existing_users:
+                results.append({'user':user_id, 'success':False, 'message':'User does not exist'})
+            elif user_id in registered:
+                results.append({'user':user_id, 'success':False, 'message':'User is already registered'})
+            else:
+                results.append({'user':user_id, 'success':True, 'message':'User has been registered'})
+
+        return Response(
+            {
+                'success':True,
+                'message':f"{len(new_user_ids)} users have been registered for '{event.name}'",
+                'results':results
+            }, status=status.HTTP_201_CREATED
+        )